@@ -0,0 +1,132 @@
+from langchain_core.messages import AIMessageChunk
+from langgraph.prebuilt import create_react_agent
+from checkpoint_store import BoundedMemorySaver
+from job_fit_analyzer import analyze_job_fit
+from content_generator import rewrite_profile_section
+from context_builder import estimate_tokens, get_context_builder
+from llm_client import DEFAULT_MODEL, DEFAULT_TEMPERATURE, clear_llm_cache, get_llm
+from rate_limiter import PRIORITY_INTERACTIVE, get_rate_limiter, next_retry_delay, request_priority, retry_delays
+from telemetry import context_isolated, span
+from dotenv import load_dotenv
+import os
+import threading
+import time
+
+load_dotenv()
+
+# Conversation messages the shared checkpointer stores per thread (tool calls and results included)
+CHECKPOINT_MAX_MESSAGES = int(os.environ.get("CHECKPOINT_MAX_MESSAGES", 200))
+
+# Process-wide caches shared by every Streamlit session, keyed by (model, temperature)
+_lock = threading.Lock()
+_agents = {}
+_checkpointers = {}
+
+
+def get_checkpointer(model=DEFAULT_MODEL, temperature=DEFAULT_TEMPERATURE):
+    """
+    Return the shared checkpointer used by the agent for a model and temperature.
+    Conversations are isolated by the thread_id passed in the invoke config. Each thread keeps
+    only its latest checkpoint with at most CHECKPOINT_MAX_MESSAGES messages, and at most
+    CONVERSATION_MAX_THREADS threads are kept, evicting the least recently used.
+    Args:
+        model (str): Gemini model name
+        temperature (float): Sampling temperature
+    Returns:
+        BoundedMemorySaver: Cached checkpointer
+    """
+    key = (model, float(temperature))
+    with _lock:
+        if key not in _checkpointers:
+            _checkpointers[key] = BoundedMemorySaver(
+                max_threads=int(os.environ.get("CONVERSATION_MAX_THREADS", 5000)),
+                max_messages=CHECKPOINT_MAX_MESSAGES,
+            )
+        return _checkpointers[key]
+
+
+def get_agent(model=DEFAULT_MODEL, temperature=DEFAULT_TEMPERATURE):
+    """
+    Return the compiled react agent with the analyze_job_fit and rewrite_profile_section tools.
+    The graph is compiled once per (model, temperature) and is safe to share across sessions.
+    Every model call goes through the shared ContextBuilder, which keeps the prompt within the
+    configured token budget while the checkpointer keeps the recent conversation.
+    Args:
+        model (str): Gemini model name
+        temperature (float): Sampling temperature
+    Returns:
+        CompiledGraph: Cached agent
+    """
+    key = (model, float(temperature))
+    with _lock:
+        agent = _agents.get(key)
+    if agent is not None:
+        return agent
+    llm = get_llm(model, temperature)
+    checkpointer = get_checkpointer(model, temperature)
+    agent = create_react_agent(
+        llm,
+        tools=[analyze_job_fit, rewrite_profile_section],
+        checkpointer=checkpointer,
+        prompt=get_context_builder().build
+    )
+    with _lock:
+        # Another session may have compiled the same agent meanwhile; keep the first one
+        return _agents.setdefault(key, agent)
+
+
+def clear_agent_cache():
+    """Drop every cached client, agent and checkpointer (e.g. after changing API keys)."""
+    clear_llm_cache()
+    with _lock:
+        _agents.clear()
+        _checkpointers.clear()
+
+
+@context_isolated
+def stream_agent_text(agent, messages, config, model=DEFAULT_MODEL):
+    """
+    Run the agent and yield the model's reply token by token as it is generated.
+    Tool calls and tool outputs are skipped; only text produced by the model node is yielded.
+    Model calls run at interactive priority on the shared Gemini limiter. A quota or server error
+    before any text was produced is retried with backoff, resuming the run from its last checkpoint.
+    The whole run is traced as an "agent.invoke" span with provider token counts when the model
+    reports usage, or estimated output tokens otherwise.
+    Args:
+        agent (CompiledGraph): Agent from get_agent()
+        messages (list): New input messages for this turn
+        config (dict): Invoke config carrying the thread_id
+        model (str): Gemini model the agent was built with
+    Yields:
+        str: Text chunks of the reply
+    """
+    thread_id = config.get("configurable", {}).get("thread_id")
+    with span("agent.invoke", thread_id=thread_id) as invoke, request_priority(PRIORITY_INTERACTIVE):
+        reply = []
+        reported_usage = False
+        graph_input = {"messages": messages}
+        delays = retry_delays()
+        while True:
+            try:
+                for chunk, metadata in agent.stream(graph_input, config=config, stream_mode="messages"):
+                    if metadata.get("langgraph_node") != "agent" or not isinstance(chunk, AIMessageChunk):
+                        continue
+                    if chunk.usage_metadata:
+                        reported_usage = True
+                        invoke.add("input_tokens", chunk.usage_metadata.get("input_tokens", 0))
+                        invoke.add("output_tokens", chunk.usage_metadata.get("output_tokens", 0))
+                    text = chunk.text  # Flattens list-of-parts content into plain text
+                    if text:
+                        reply.append(text)
+                        yield text
+                break
+            except Exception as e:
+                # Part of the answer is already on screen, so a retry could not be stitched in
+                delay = None if reply else next_retry_delay(e, get_rate_limiter("gemini", model), delays)
+                if delay is None:
+                    raise
+            invoke.add("retries", 1)
+            time.sleep(delay)
+            graph_input = None  # The checkpointer holds this turn's input; resume instead of resending it
+        if not reported_usage:
+            invoke.set(output_tokens=estimate_tokens("".join(reply)), usage_estimated=True)
@@ -1,33 +1,98 @@
 import streamlit as st
-from langchain_google_genai import ChatGoogleGenerativeAI
-from langchain_core.messages import HumanMessage, AIMessage
-from langgraph.prebuilt import create_react_agent
-from langgraph.checkpoint.memory import MemorySaver
-from linkedin_scraper import scrape_linkedin_profile
-from job_fit_analyzer import analyze_job_fit
-from content_generator import rewrite_profile_section
+from langchain_core.messages import HumanMessage
+from scrape_jobs import FINISHED_STATUSES, get_scrape_jobs
+from agent_factory import CHECKPOINT_MAX_MESSAGES, get_agent, get_checkpointer, stream_agent_text
+from conversation_store import conversation_id, get_conversation_store, turns_to_messages
+from linkedin_scraper import normalize_username
+from context_builder import CONTEXT_MESSAGE_NAME, PROFILE_SECTIONS, serialize_profile
+from section_analyzer import ANALYSIS, IMPROVEMENT, PARTIAL, assemble_report, iter_section_analysis, report_digest
+from profile_record import ProfileRecord
+from telemetry import debug_json, start_metrics_server
 from dotenv import load_dotenv
 import os
-import json
+import uuid
 
 # Load environment variables
 load_dotenv()
 
+# Expose /metrics when METRICS_PORT is set (started once per process)
+start_metrics_server()
+
+# Chat turns shown at first, and loaded per "Show earlier messages" click
+HISTORY_PAGE_SIZE = 20
+
 # Initialize session state for memory and user data
 if "profile_data" not in st.session_state:
     st.session_state.profile_data = None
-if "chat_history_all" not in st.session_state:
-    st.session_state.chat_history_all = {}  # Dictionary to store chat history per profile URL
+if "session_key" not in st.session_state:
+    # Kept in the page URL so a reload or server restart finds the same stored conversations
+    st.session_state.session_key = st.query_params.get("session") or uuid.uuid4().hex
+    st.query_params["session"] = st.session_state.session_key
+if "history_limit" not in st.session_state:
+    st.session_state.history_limit = HISTORY_PAGE_SIZE  # Chat turns loaded from the conversation store
 if "current_url" not in st.session_state:
     st.session_state.current_url = None
 if "thread_id" not in st.session_state:
-    st.session_state.thread_id = "default_thread"
-if "messages" not in st.session_state:
-    st.session_state.messages = []
+    st.session_state.thread_id = f"thread_default_{uuid.uuid4().hex[:12]}"  # Checkpointer is shared, so keep threads per session
+if "chat_primed_thread" not in st.session_state:
+    st.session_state.chat_primed_thread = None  # Thread that already holds the chat system prompt
 if "analysis_response" not in st.session_state:
     st.session_state.analysis_response = None  # To store profile analysis
 if "improvement_response" not in st.session_state:
     st.session_state.improvement_response = None  # To store suggested improvements
+if "analysis_digest" not in st.session_state:
+    st.session_state.analysis_digest = None  # Compact per-section digest of both, for the chat context
+if "scrape_job_id" not in st.session_state:
+    st.session_state.scrape_job_id = None  # Background scrape the analysis is waiting on
+
+def conversation_for(url):
+    """
+    Args:
+        url (str): LinkedIn profile URL
+    Returns:
+        str: Id of this session's stored conversation about the profile
+    """
+    return conversation_id(st.session_state.session_key, normalize_username(url))
+
+def show_earlier_messages():
+    st.session_state.history_limit += HISTORY_PAGE_SIZE
+
+def stream_response(agent, messages, config, fallback):
+    """
+    Stream the agent's reply into the page token by token as it is generated.
+    Args:
+        agent (CompiledGraph): Agent from get_agent()
+        messages (list): New input messages for this turn
+        config (dict): Invoke config carrying the thread_id
+        fallback (str): Text shown and returned if the model produced no text
+    Returns:
+        str: The full reply text
+    """
+    response = st.write_stream(stream_agent_text(agent, messages, config))
+    if not isinstance(response, str):
+        response = "".join(str(part) for part in response or [])
+    if not response:
+        st.write(fallback)
+        response = fallback
+    return response
+
+@st.fragment(run_every=1.0)
+def show_scrape_progress(job_id):
+    """
+    Poll a background scrape once a second without rerunning the whole page, and rerun the app
+    once it has finished so the analysis can start.
+    Args:
+        job_id (str): Id from get_scrape_jobs().submit()
+    """
+    status = get_scrape_jobs().status(job_id)
+    if status is None or status["status"] in FINISHED_STATUSES:
+        st.rerun()
+    label = "Waiting for a free scraper" if status["status"] == "queued" else "Scraping your profile"
+    shared = f" (shared with {status['shared_with']} other request(s))" if status["shared_with"] else ""
+    st.info(f"{label}{shared}... {status['elapsed_seconds']:.0f}s")
+    if st.button("Cancel", key="cancel_scrape"):
+        get_scrape_jobs().cancel(job_id)
+        st.rerun()
 
 # Streamlit UI Setup
 st.title("LearnTube")
@@ -35,115 +100,70 @@ st.subheader("Optimize Your LinkedIn Profile and Career Path")
 
 # Input for LinkedIn Profile URL with a unique key
 linkedin_url = st.text_input("Enter your LinkedIn Profile URL:", value="", key="linkedin_url_input")
+# Cached scrapes are reused for a while; allow the user to bypass the cache
+force_refresh = st.checkbox("Fetch fresh profile data (ignore cached scrape)", value=False, key="force_refresh")
 
 # Button to trigger profile analysis
+analysis_streamed = False
 if st.button("Analyze Profile") and linkedin_url:
     # Check if the URL is different from the currently analyzed one
     if st.session_state.current_url != linkedin_url:
         # If a new profile URL, update current_url and thread_id
         st.session_state.current_url = linkedin_url
-        st.session_state.thread_id = f"thread_{linkedin_url[-10:]}"  # Unique thread ID per profile
-        # Initialize chat history for this URL if not already present
-        if linkedin_url not in st.session_state.chat_history_all:
-            st.session_state.chat_history_all[linkedin_url] = []
-        # Clear messages for LLM to start fresh for new profile
-        st.session_state.messages = []
+        st.session_state.history_limit = HISTORY_PAGE_SIZE
         # Clear previous analysis results to avoid displaying old data
         st.session_state.analysis_response = None
         st.session_state.improvement_response = None
+        st.session_state.analysis_digest = None
         st.write("Starting fresh for a new profile analysis.")
-    
-    with st.spinner("Scraping and analyzing your profile..."):
-        profile_data = scrape_linkedin_profile(linkedin_url)
-        st.session_state.profile_data = profile_data
+    # Every analysis run starts its own thread in the shared checkpointer; the chat below continues it.
+    # The previous thread is dropped so the in-memory checkpointer does not grow with every analysis
+    get_checkpointer().delete_thread(st.session_state.thread_id)
+    st.session_state.thread_id = f"{conversation_for(linkedin_url)}_{uuid.uuid4().hex[:12]}"
+    # Scrape in the background; identical in-flight requests from other sessions share one actor run
+    if st.session_state.scrape_job_id:
+        get_scrape_jobs().cancel(st.session_state.scrape_job_id)
+    st.session_state.scrape_job_id = get_scrape_jobs().submit(linkedin_url, force_refresh=force_refresh)
+
+# Follow the pending scrape, and analyze the profile once it is ready
+scrape_status = get_scrape_jobs().status(st.session_state.scrape_job_id) if st.session_state.scrape_job_id else None
+if st.session_state.scrape_job_id and scrape_status is None:
+    st.session_state.scrape_job_id = None  # Expired job
+elif scrape_status and scrape_status["status"] not in FINISHED_STATUSES:
+    show_scrape_progress(st.session_state.scrape_job_id)
+elif scrape_status:
+    profile_data = get_scrape_jobs().result(st.session_state.scrape_job_id)
+    st.session_state.scrape_job_id = None
+    with st.spinner("Analyzing your profile..."):
+        # Keep only the compact typed record (not the scraper dict) in session state
+        st.session_state.profile_data = profile_data if "error" in profile_data else ProfileRecord.from_dict(profile_data)
         if "error" in profile_data:
             st.error(profile_data["error"])
         else:
             # Removed display of JSON data on Streamlit app; only log to console for debugging
-            print("Debug: Processed Profile Data Passed to LLM:", json.dumps(profile_data, indent=2))  # Print to console for debugging
+            debug_json("Debug: Processed Profile Data Passed to LLM:", profile_data)  # Serialized only with LOG_LEVEL=DEBUG
             
-            # Initialize Gemini LLM for analysis
-            llm = ChatGoogleGenerativeAI(model="gemini-2.0-flash", temperature=0.7)
-            # Initialize memory with a checkpointer
-            memory_saver = MemorySaver()
-            # Create the agent with a checkpointer for memory
-            agent = create_react_agent(
-                llm,
-                tools=[analyze_job_fit, rewrite_profile_section],
-                checkpointer=memory_saver
-            )
-            # Configure thread ID for memory persistence (unique per profile)
-            config = {"configurable": {"thread_id": st.session_state.thread_id}}
-            # Format input for profile analysis using LLM with detailed prompt
-            system_prompt = """You are a professional career coach specializing in LinkedIn profile optimization. Your task is to analyze the provided LinkedIn profile data and provide a detailed, personalized evaluation. Focus on the following sections:
-            - fullName: The user's full name.
-            - headline: The professional title or tagline.
-            - about: The summary section.
-            - experience: List of work experiences.
-            - skills: List of skills.
-            - education: List of educational background entries.
-            - certifications: List of certifications.
-            For each section:
-            - Assess the completeness and quality of the content.
-            - Highlight strengths and identify weaknesses or gaps.
-            - Provide specific feedback based on the actual data provided.
-            Do not give generic responses. Tailor your analysis to the specific details in the data. If a section is empty or lacks detail, note it and explain the impact. Use a structured format with headings for each section analyzed."""
-            # Extract key sections for clarity in prompt
-            profile_summary = f"""
-            Full Name: {profile_data.get('fullName', 'Not provided')}
-            Headline: {profile_data.get('headline', 'Not provided')}
-            About/Summary: {profile_data.get('about', 'Not provided')}
-            Experiences: {json.dumps(profile_data.get('experience', []), indent=2)}
-            Skills: {json.dumps(profile_data.get('skills', []), indent=2)}
-            Education: {json.dumps(profile_data.get('education', []), indent=2)}
-            Certifications: {json.dumps(profile_data.get('certifications', []), indent=2)}
-            """
-            analysis_input = f"Analyze this LinkedIn profile data in detail:\n{profile_summary}"
-            full_input_messages = [
-                HumanMessage(content=f"System: {system_prompt}\n{analysis_input}")
-            ]
-            # Invoke the agent for profile analysis
-            result = agent.invoke({"messages": full_input_messages}, config=config)
-            # Extract response based on result type
-            if isinstance(result, AIMessage):
-                analysis_response = result.content
-            elif isinstance(result, dict) and "messages" in result:
-                last_message = result["messages"][-1] if result["messages"] else {"content": "Sorry, I couldn't analyze your profile."}
-                analysis_response = last_message.get("content", "Sorry, I couldn't analyze your profile.") if isinstance(last_message, dict) else last_message.content
-            else:
-                analysis_response = "Sorry, I couldn't analyze your profile."
-            st.session_state.analysis_response = analysis_response  # Store in session state to persist
-            
-            # Format input for suggested improvements using LLM with detailed prompt
-            improvement_prompt = """Based on the LinkedIn profile analysis, provide specific, actionable suggestions for improvement to enhance the profile's effectiveness for job opportunities and career growth. Focus on each section (fullName, headline, about, experience, skills, education, certifications) and suggest:
-            - Specific content to add or improve.
-            - Keywords or skills to include based on the user's current data.
-            - Strategies to align the profile with industry standards.
-            Use a structured format with headings for each section. Tailor suggestions to the user's existing data and career context inferred from the profile."""
-            full_input_messages.append(HumanMessage(content=improvement_prompt))
-            # Invoke the agent for improvement suggestions
-            result = agent.invoke({"messages": full_input_messages}, config=config)
-            # Extract response based on result type
-            if isinstance(result, AIMessage):
-                improvement_response = result.content
-            elif isinstance(result, dict) and "messages" in result:
-                last_message = result["messages"][-1] if result["messages"] else {"content": "Sorry, I couldn't provide suggestions."}
-                improvement_response = last_message.get("content", "Sorry, I couldn't provide suggestions.") if isinstance(last_message, dict) else last_message.content
-            else:
-                improvement_response = "Sorry, I couldn't provide suggestions."
-            st.session_state.improvement_response = improvement_response  # Store in session state to persist
-            
-            # Display results
+            # Each section is analyzed on its own and keyed by a hash of its content, so after an
+            # edit only the changed sections go to the model (in parallel); the rest come from the cache
             st.write("### Profile Analysis")
-            st.write(analysis_response)
+            slots = {ANALYSIS: {section: st.empty() for section in PROFILE_SECTIONS}}
             st.write("### Suggested Improvements")
-            st.write(improvement_response)
+            slots[IMPROVEMENT] = {section: st.empty() for section in PROFILE_SECTIONS}
+            parts = {ANALYSIS: {}, IMPROVEMENT: {}}
+            # Stream each section into its place in the report as it is generated
+            for kind, section, text, state in iter_section_analysis(st.session_state.profile_data):
+                slots[kind][section].markdown(text)
+                if state != PARTIAL:
+                    parts[kind][section] = text
+            st.session_state.analysis_response = assemble_report(parts[ANALYSIS])  # Store in session state to persist
+            st.session_state.improvement_response = assemble_report(parts[IMPROVEMENT])
+            st.session_state.analysis_digest = report_digest(parts[ANALYSIS], parts[IMPROVEMENT])
+            analysis_streamed = True
             # Update chat history for the current profile with initial bot message
-            st.session_state.chat_history_all[linkedin_url].append(("Bot", "Profile analyzed. Here is the detailed feedback and suggestions. Ask me for specific career guidance or profile feedback based on this analysis."))
-            st.session_state.messages.append(AIMessage(content="Profile analyzed. Here is the detailed feedback:\n\n**Profile Analysis:**\n" + analysis_response + "\n\n**Suggested Improvements:**\n" + improvement_response + "\n\nAsk me for specific career guidance or profile feedback based on this analysis."))
+            get_conversation_store().append(conversation_for(st.session_state.current_url), "Bot", "Profile analyzed. Here is the detailed feedback and suggestions. Ask me for specific career guidance or profile feedback based on this analysis.")
 
-# Always display the analysis results if they exist for the current profile
-if st.session_state.analysis_response and st.session_state.current_url == linkedin_url:
+# Always display the analysis results if they exist for the current profile (unless just streamed above)
+if st.session_state.analysis_response and st.session_state.current_url == linkedin_url and not analysis_streamed:
     st.write("### Profile Analysis")
     st.write(st.session_state.analysis_response)
     st.write("### Suggested Improvements")
@@ -154,59 +174,49 @@ st.write("### Ask for Career Guidance or Profile Feedback")
 user_input = st.text_input("Type your question here (e.g., 'What skills should I add for a data science role?' or 'How can I improve my headline?'):", value="", key="user_input_text")
 if user_input and st.button("Send"):
     if st.session_state.current_url:
-        st.session_state.chat_history_all[st.session_state.current_url].append(("You", user_input))
-        st.session_state.messages.append(HumanMessage(content=user_input))
+        get_conversation_store().append(conversation_for(st.session_state.current_url), "You", user_input)
         with st.spinner("Processing your request..."):
-            # Initialize Gemini LLM
-            llm = ChatGoogleGenerativeAI(model="gemini-2.0-flash", temperature=0.7)
-            # Initialize memory with a checkpointer
-            memory_saver = MemorySaver()
-            # Create the agent with a checkpointer for memory
-            agent = create_react_agent(
-                llm,
-                tools=[analyze_job_fit, rewrite_profile_section],
-                checkpointer=memory_saver
-            )
-            # Configure thread ID for memory persistence (unique per profile)
+            # Reuse the process-wide agent and continue this profile's thread
+            agent = get_agent()
             config = {"configurable": {"thread_id": st.session_state.thread_id}}
             # Format input as messages for Gemini API with profile context
             system_prompt = """You are a professional career coach specializing in LinkedIn profile optimization and career guidance. Use the provided LinkedIn profile data to answer user questions with personalized advice. Tailor your responses to the user's specific background, skills, experiences, and career context. If the user asks about specific career paths, job roles, or profile improvements, provide detailed, actionable suggestions. If no profile data is available, inform the user and suggest analyzing a LinkedIn profile first. Maintain a supportive and professional tone, and retain context from previous interactions."""
             # Check if profile_data exists before accessing it
             if st.session_state.profile_data and "error" not in st.session_state.profile_data:
-                profile_summary = f"""
-                Full Name: {st.session_state.profile_data.get('fullName', 'Not provided')}
-                Headline: {st.session_state.profile_data.get('headline', 'Not provided')}
-                About/Summary: {st.session_state.profile_data.get('about', 'Not provided')}
-                Experiences: {json.dumps(st.session_state.profile_data.get('experience', []), indent=2)}
-                Skills: {json.dumps(st.session_state.profile_data.get('skills', []), indent=2)}
-                Education: {json.dumps(st.session_state.profile_data.get('education', []), indent=2)}
-                Certifications: {json.dumps(st.session_state.profile_data.get('certifications', []), indent=2)}
-                """
+                profile_summary = serialize_profile(st.session_state.profile_data)
             else:
                 profile_summary = "No LinkedIn profile data available. Please analyze a profile first by entering a LinkedIn URL and clicking 'Analyze Profile'."
-            full_input_messages = [
-                HumanMessage(content=f"System: {system_prompt}\nProfile Data Summary for Context:\n{profile_summary}"),
-                *st.session_state.messages
-            ]
-            # Directly invoke the agent with the formatted messages
-            result = agent.invoke({"messages": full_input_messages}, config=config)
-            # Extract response based on result type
-            if isinstance(result, AIMessage):
-                response = result.content
-            elif isinstance(result, dict) and "messages" in result:
-                last_message = result["messages"][-1] if result["messages"] else {"content": "Sorry, I couldn't process your request."}
-                response = last_message.get("content", "Sorry, I couldn't process your request.") if isinstance(last_message, dict) else last_message.content
-            else:
-                response = "Sorry, I couldn't process your request."
-            st.session_state.chat_history_all[st.session_state.current_url].append(("Bot", response))
-            st.session_state.messages.append(AIMessage(content=response))
+            # The analysis shown above goes in as a compact per-section digest inside the context
+            # message, which the context builder always keeps and budgets for first
+            if st.session_state.analysis_digest:
+                profile_summary += f"\nDigest of the profile analysis and suggestions shown to the user:\n{st.session_state.analysis_digest}"
+            # The checkpointer keeps the thread's earlier turns, so only send what is new:
+            # the chat system prompt once per thread, then the latest question
+            full_input_messages = [HumanMessage(content=user_input)]
+            if st.session_state.chat_primed_thread != st.session_state.thread_id:
+                # The conversation store is the source of truth for the chat, so a new thread (after a
+                # re-analysis or a restart) starts from the stored turns, minus the question just added
+                stored_turns = get_conversation_store().recent(conversation_for(st.session_state.current_url), CHECKPOINT_MAX_MESSAGES + 1)[:-1]
+                full_input_messages[:0] = [HumanMessage(content=f"System: {system_prompt}\nProfile Data Summary for Context:\n{profile_summary}", name=CONTEXT_MESSAGE_NAME)] + turns_to_messages(stored_turns)
+                st.session_state.chat_primed_thread = st.session_state.thread_id
+            # Stream the answer while it is generated; the chat history below shows it once done
+            live_answer = st.empty()
+            with live_answer.container():
+                response = stream_response(agent, full_input_messages, config, "Sorry, I couldn't process your request.")
+            live_answer.empty()
+            get_conversation_store().append(conversation_for(st.session_state.current_url), "Bot", response)
     else:
         st.warning("Please analyze a LinkedIn profile first before asking questions.")
 
 # Display Chat History for the Current Profile Only
 st.write("### Chat History")
-if st.session_state.current_url and st.session_state.current_url in st.session_state.chat_history_all:
-    for sender, message in st.session_state.chat_history_all[st.session_state.current_url]:
+# Only the newest turns are loaded; earlier ones stay in the conversation store until asked for
+history_url = st.session_state.current_url or linkedin_url
+history = get_conversation_store().recent(conversation_for(history_url), st.session_state.history_limit) if history_url else []
+if history:
+    if get_conversation_store().count(conversation_for(history_url)) > len(history):
+        st.button("Show earlier messages", on_click=show_earlier_messages)
+    for sender, message in history:
         st.write(f"**{sender}:** {message}")
 else:
     st.write("No chat history available. Analyze a profile and start asking questions!")
@@ -0,0 +1,68 @@
+"""
+Compare per-request setup overhead of building the LLM client and react agent on every
+button press (the old app.py behaviour) against reusing the cached agent from agent_factory.
+No model calls are made, so no quota is spent.
+
+Usage:
+    python benchmarks/bench_agent_factory.py [iterations]
+"""
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+# The client only validates that a key is present; nothing is sent to the API
+os.environ.setdefault("GOOGLE_API_KEY", "benchmark-placeholder-key")
+
+from langchain_google_genai import ChatGoogleGenerativeAI
+from langgraph.prebuilt import create_react_agent
+from langgraph.checkpoint.memory import MemorySaver
+from agent_factory import DEFAULT_MODEL, DEFAULT_TEMPERATURE, clear_agent_cache, get_agent
+from job_fit_analyzer import analyze_job_fit
+from content_generator import rewrite_profile_section
+
+
+def build_uncached():
+    """Replicates the per-click setup app.py used to do."""
+    llm = ChatGoogleGenerativeAI(model=DEFAULT_MODEL, temperature=DEFAULT_TEMPERATURE)
+    return create_react_agent(
+        llm,
+        tools=[analyze_job_fit, rewrite_profile_section],
+        checkpointer=MemorySaver()
+    )
+
+
+def time_calls(fn, iterations):
+    timings = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - start)
+    timings.sort()
+    return {
+        "mean_ms": 1000 * sum(timings) / len(timings),
+        "p50_ms": 1000 * timings[len(timings) // 2],
+        "max_ms": 1000 * timings[-1],
+    }
+
+
+def main():
+    iterations = int(sys.argv[1]) if len(sys.argv) > 1 else 50
+    cold = time_calls(build_uncached, iterations)
+
+    clear_agent_cache()
+    start = time.perf_counter()
+    get_agent()
+    first_ms = 1000 * (time.perf_counter() - start)
+    warm = time_calls(get_agent, iterations)
+
+    print(f"Per-request agent setup over {iterations} iterations")
+    print(f"  uncached build : mean {cold['mean_ms']:.2f} ms, p50 {cold['p50_ms']:.2f} ms, max {cold['max_ms']:.2f} ms")
+    print(f"  factory (first): {first_ms:.2f} ms")
+    print(f"  factory (warm) : mean {warm['mean_ms']:.4f} ms, p50 {warm['p50_ms']:.4f} ms, max {warm['max_ms']:.4f} ms")
+    if warm["mean_ms"]:
+        print(f"  speed-up       : {cold['mean_ms'] / warm['mean_ms']:.0f}x")
+
+
+if __name__ == "__main__":
+    main()
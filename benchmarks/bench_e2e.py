@@ -0,0 +1,232 @@
+"""
+Offline end-to-end benchmark of app.py. Streamlit's AppTest drives the real script headlessly
+(Analyze Profile, then N chat turns per session) while benchmarks/fakes.py stands in for Apify
+and Gemini. Reports p50/p95/p99 latencies, call counts and prompt sizes, and stores them as JSON.
+
+Usage:
+    python benchmarks/bench_e2e.py --sessions 5 --chat-turns 3 [--llm-first-token 0.2] [--compare old.json]
+"""
+import argparse
+import json
+import os
+import platform
+import random
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+# Everything below runs against the stand-ins; no real keys are needed or used
+os.environ["GOOGLE_API_KEY"] = "benchmark-placeholder-key"
+os.environ["APIFY_API_TOKEN"] = "benchmark-placeholder-token"
+_state_dir = tempfile.mkdtemp(prefix="bench-e2e-")
+os.environ["SCRAPE_CACHE_PATH"] = os.path.join(_state_dir, "scrape_cache.sqlite3")
+os.environ["CONVERSATION_DB_PATH"] = os.path.join(_state_dir, "conversations.sqlite3")
+os.environ["RESPONSE_CACHE_PATH"] = ""
+# Measure the app itself here; bench_rate_limits.py covers quota behaviour
+os.environ.setdefault("GEMINI_RPM", "100000")
+os.environ.setdefault("APIFY_RPM", "100000")
+
+from streamlit.testing.v1 import AppTest
+from fakes import CallRecorder, FakeApifyClient, FakeChatModel
+import agent_factory
+import linkedin_scraper
+import llm_client
+import section_analyzer
+
+
+def percentile(values, pct):
+    """Nearest-rank percentile of a list of numbers."""
+    if not values:
+        return None
+    ordered = sorted(values)
+    rank = max(1, -(-pct * len(ordered) // 100))
+    return ordered[int(rank) - 1]
+
+
+def summarize(values):
+    return {
+        "count": len(values),
+        "mean": sum(values) / len(values) if values else None,
+        "p50": percentile(values, 50),
+        "p95": percentile(values, 95),
+        "p99": percentile(values, 99),
+        "max": max(values) if values else None,
+    }
+
+
+def install_fakes(args, recorder):
+    """Swap the Apify client and the Gemini client for the stand-ins and time the hot paths."""
+    linkedin_scraper.ApifyClient = lambda token: FakeApifyClient(
+        token,
+        run_seconds=args.apify_run_seconds,
+        failure_rate=args.apify_failure_rate,
+        experience_entries=args.experience_entries,
+        description_chars=args.description_chars,
+        recorder=recorder,
+    )
+    llm_client.ChatGoogleGenerativeAI = lambda model, temperature, **kwargs: FakeChatModel(
+        first_token_latency=args.llm_first_token,
+        generation_latency=args.llm_generation,
+        failure_rate=args.llm_failure_rate,
+        response_tokens=args.response_tokens,
+        recorder=recorder,
+        **kwargs,
+    )
+    agent_factory.clear_agent_cache()
+
+    scrape = linkedin_scraper.scrape_linkedin_profile
+
+    def timed_scrape(url, force_refresh=False, cancel_event=None):
+        start = time.perf_counter()
+        result = scrape(url, force_refresh=force_refresh, cancel_event=cancel_event)
+        recorder.sample("scrape", time.perf_counter() - start)
+        return result
+
+    stream = agent_factory.stream_agent_text
+
+    def timed_stream(agent, messages, config):
+        kind = "chat_invoke"  # The profile analysis goes through section_analyzer, timed below
+        start = time.perf_counter()
+        first_token = None
+        for chunk in stream(agent, messages, config):
+            if first_token is None:
+                first_token = time.perf_counter() - start
+            yield chunk
+        recorder.sample(kind, time.perf_counter() - start)
+        if first_token is not None:
+            recorder.sample(f"{kind}.first_token", first_token)
+
+    analyze_sections = section_analyzer.iter_section_analysis
+
+    def timed_section_analysis(profile_data, max_concurrency=None):
+        start = time.perf_counter()
+        first = first_section = None
+        for part in analyze_sections(profile_data, max_concurrency):
+            if first is None:
+                first = time.perf_counter() - start
+            if part[3] != section_analyzer.PARTIAL:
+                if first_section is None:
+                    first_section = time.perf_counter() - start
+                recorder.count("section_analysis.cached" if part[3] == section_analyzer.CACHED else "section_analysis.fresh")
+            yield part
+        recorder.sample("section_analysis", time.perf_counter() - start)
+        if first is not None:
+            recorder.sample("section_analysis.first_token", first)
+            recorder.sample("section_analysis.first_section", first_section)
+
+    # scrape_jobs and app.py look these names up at call time, so patching the modules is enough
+    linkedin_scraper.scrape_linkedin_profile = timed_scrape
+    agent_factory.stream_agent_text = timed_stream
+    section_analyzer.iter_section_analysis = timed_section_analysis
+
+
+def run_session(index, args, recorder):
+    app = AppTest.from_file(os.path.join(ROOT, "app.py"), default_timeout=args.timeout)
+    app.run()
+    app.text_input(key="linkedin_url_input").input(f"https://www.linkedin.com/in/bench-user-{args.seed}-{index}/")
+    analyze = next(button for button in app.button if button.label == "Analyze Profile")
+    start = time.perf_counter()
+    analyze.click().run()
+    # The scrape runs in the background; rerun the script like the status poller does until it is consumed
+    while app.session_state["scrape_job_id"] and not app.exception:
+        time.sleep(0.05)
+        app.run()
+    recorder.sample("analyze_click", time.perf_counter() - start)
+    if app.exception:
+        recorder.count("app.exceptions")
+        return
+
+    for turn in range(args.chat_turns):
+        app.text_input(key="user_input_text").input(f"Question {turn}: what should I improve for a data science role?").run()
+        send = next(button for button in app.button if button.label == "Send")
+        start = time.perf_counter()
+        send.click().run()
+        recorder.sample("chat_turn", time.perf_counter() - start)
+        if app.exception:
+            recorder.count("app.exceptions")
+            return
+
+
+def git_revision():
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, text=True).strip()
+    except Exception:
+        return None
+
+
+def compare(current, baseline_path):
+    with open(baseline_path, encoding="utf-8") as f:
+        baseline = json.load(f)
+    print(f"\nComparison with {baseline_path} ({baseline.get('revision')})")
+    for name, stats in current["latency"].items():
+        old = baseline.get("latency", {}).get(name)
+        if not old or not old.get("p50") or stats["p50"] is None:
+            continue
+        print(f"  {name:<32} p50 {old['p50'] * 1000:8.1f} -> {stats['p50'] * 1000:8.1f} ms "
+              f"({100 * (stats['p50'] / old['p50'] - 1):+.0f}%)   p95 {old['p95'] * 1000:8.1f} -> {stats['p95'] * 1000:8.1f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Offline end-to-end latency benchmark for app.py.")
+    parser.add_argument("--sessions", type=int, default=5)
+    parser.add_argument("--chat-turns", type=int, default=3)
+    parser.add_argument("--llm-first-token", type=float, default=0.2, help="Seconds before the first token")
+    parser.add_argument("--llm-generation", type=float, default=0.5, help="Seconds to stream the rest of a reply")
+    parser.add_argument("--llm-failure-rate", type=float, default=0.0)
+    parser.add_argument("--response-tokens", type=int, default=200)
+    parser.add_argument("--apify-run-seconds", type=float, default=1.0)
+    parser.add_argument("--apify-failure-rate", type=float, default=0.0)
+    parser.add_argument("--experience-entries", type=int, default=5, help="Payload size: experience entries per profile")
+    parser.add_argument("--description-chars", type=int, default=400, help="Payload size: characters per description")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--timeout", type=float, default=300, help="Seconds allowed per script run")
+    parser.add_argument("--output", default=None, help="JSON results path (default: benchmarks/results/e2e-<time>.json)")
+    parser.add_argument("--compare", default=None, help="Earlier results JSON to compare against")
+    args = parser.parse_args()
+
+    random.seed(args.seed)
+    recorder = CallRecorder()
+    install_fakes(args, recorder)
+    start = time.perf_counter()
+    for index in range(args.sessions):
+        run_session(index, args, recorder)
+    wall = time.perf_counter() - start
+
+    latency_keys = [key for key in recorder.samples if not key.startswith("llm.")]
+    results = {
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "revision": git_revision(),
+        "python": platform.python_version(),
+        "config": vars(args),
+        "wall_seconds": wall,
+        "latency": {key: summarize(recorder.samples[key]) for key in sorted(latency_keys)},
+        "prompt_tokens": summarize(recorder.samples.get("llm.prompt_tokens", [])),
+        "prompt_messages": summarize(recorder.samples.get("llm.prompt_messages", [])),
+        "calls": dict(sorted(recorder.counts.items())),
+    }
+
+    output = args.output or os.path.join(ROOT, "benchmarks", "results", f"e2e-{time.strftime('%Y%m%d-%H%M%S')}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, "w", encoding="utf-8") as f:
+        json.dump(results, f, indent=2)
+
+    print(f"{args.sessions} sessions x {args.chat_turns} chat turns in {wall:.1f}s")
+    for name, stats in results["latency"].items():
+        print(f"  {name:<32} n={stats['count']:<4} p50 {stats['p50'] * 1000:8.1f} ms  "
+              f"p95 {stats['p95'] * 1000:8.1f} ms  p99 {stats['p99'] * 1000:8.1f} ms")
+    tokens = results["prompt_tokens"]
+    if tokens["count"]:
+        print(f"  prompt tokens (est.)             p50 {tokens['p50']}  p95 {tokens['p95']}  max {tokens['max']}")
+    print(f"  calls: {results['calls']}")
+    print(f"Results written to {output}")
+    if args.compare:
+        compare(results, args.compare)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+"""
+Time job-fit scoring against a large synthetic role corpus: one profile against every role,
+and a batch of profiles against every role, using the memory-mapped index from job_fit_analyzer.
+
+Usage:
+    python benchmarks/bench_job_fit.py [roles] [vocabulary]
+"""
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+from job_fit_analyzer import JobFitIndex, build_index
+
+
+def synthetic_corpus(roles, vocabulary, seed=7):
+    rng = random.Random(seed)
+    skills = [f"skill{i}" for i in range(vocabulary)]
+    return {
+        "synonyms": {},
+        "roles": [
+            {
+                "title": f"Role {i}",
+                "aliases": [],
+                "skills": rng.sample(skills, 14),
+                "description": " ".join(rng.sample(skills, 20)),
+            }
+            for i in range(roles)
+        ],
+    }
+
+
+def main():
+    roles = int(sys.argv[1]) if len(sys.argv) > 1 else 5000
+    vocabulary = int(sys.argv[2]) if len(sys.argv) > 2 else 2000
+    with tempfile.TemporaryDirectory() as workdir:
+        corpus_path = os.path.join(workdir, "roles.json")
+        with open(corpus_path, "w", encoding="utf-8") as f:
+            json.dump(synthetic_corpus(roles, vocabulary), f)
+
+        start = time.perf_counter()
+        prefix = build_index(corpus_path, workdir)
+        build_ms = 1000 * (time.perf_counter() - start)
+        start = time.perf_counter()
+        index = JobFitIndex(prefix)
+        load_ms = 1000 * (time.perf_counter() - start)
+
+        rng = random.Random(11)
+        profile = {"skills": [f"skill{rng.randrange(vocabulary)}" for _ in range(25)],
+                   "about": " ".join(f"skill{rng.randrange(vocabulary)}" for _ in range(40))}
+        iterations = 200
+        start = time.perf_counter()
+        for _ in range(iterations):
+            vector = index.profile_vector(profile)
+            scores = index.scores(vector)
+            best = int(np.argmax(scores))
+            index.missing_skills(best, vector)
+        single_ms = 1000 * (time.perf_counter() - start) / iterations
+
+        batch = np.stack([index.profile_vector(profile)] * 1000)
+        start = time.perf_counter()
+        index.scores(batch)
+        batch_ms = 1000 * (time.perf_counter() - start)
+
+    print(f"Index: {roles} roles x {vocabulary} skills")
+    print(f"  build           : {build_ms:.1f} ms (once per corpus version)")
+    print(f"  load (mmap)     : {load_ms:.1f} ms")
+    print(f"  one profile     : {single_ms:.3f} ms to encode, score all roles and list missing skills")
+    print(f"  1000 profiles   : {batch_ms:.1f} ms to score against all roles")
+
+
+if __name__ == "__main__":
+    main()
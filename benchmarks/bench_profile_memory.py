@@ -0,0 +1,104 @@
+"""
+Measure the memory one session's profile costs in st.session_state: the dict the scraper used to
+return (carrying the raw Apify experience/education payloads) against the compact ProfileRecord.
+
+Usage:
+    python benchmarks/bench_profile_memory.py [sessions]
+"""
+import json
+import os
+import random
+import sys
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from profile_record import ProfileRecord
+
+SKILLS = ["Python", "SQL", "Machine Learning", "Pandas", "Docker", "AWS", "Leadership", "Communication",
+          "Data Analysis", "Tableau", "Git", "Agile", "Statistics", "Deep Learning", "Excel", "Kubernetes"]
+
+
+def raw_apify_item(seed):
+    """A dataset item shaped like the actor's output, including the fields the app never uses."""
+    rng = random.Random(seed)
+    experience = []
+    for i in range(rng.randint(3, 8)):
+        experience.append({
+            "title": f"Senior Engineer {i}",
+            "company": rng.choice(["Acme Corp", "Globex", "Initech", "Umbrella", "Hooli"]),
+            "company_id": str(rng.randrange(10 ** 8)),
+            "company_linkedin_url": f"https://www.linkedin.com/company/{rng.randrange(10 ** 6)}/",
+            "company_logo_url": "https://media.licdn.com/dms/image/v2/" + "x" * 180,
+            "employment_type": "Full-time",
+            "location": "Bengaluru, Karnataka, India",
+            "location_type": "Hybrid",
+            "start_date": {"year": 2015 + i, "month": "Jan"},
+            "end_date": {"year": 2016 + i, "month": "Dec"},
+            "is_current": False,
+            "duration": "2 yrs",
+            "description": "Led projects delivering measurable results. " * rng.randint(2, 8),
+            "skills": rng.sample(SKILLS, rng.randint(3, 8)),
+            "media": [{"url": "https://media.licdn.com/" + "y" * 120, "title": "Demo"}],
+        })
+    education = [{
+        "school": "Indian Institute of Technology",
+        "school_id": str(rng.randrange(10 ** 6)),
+        "school_linkedin_url": "https://www.linkedin.com/school/iit/",
+        "school_logo_url": "https://media.licdn.com/dms/image/v2/" + "z" * 180,
+        "degree": "Bachelor of Technology",
+        "field_of_study": "Computer Science",
+        "start_date": {"year": 2010}, "end_date": {"year": 2014},
+        "activities": "Coding club, " * 5,
+    }]
+    return {
+        "basic_info": {"fullname": f"Learner {seed}", "headline": "Engineer | Data | Cloud",
+                       "about": "I build data products. " * 20, "public_identifier": f"learner-{seed}"},
+        "experience": experience,
+        "education": education,
+    }
+
+
+def legacy_profile(raw_profile):
+    """The dict scrape_linkedin_profile returned before ProfileRecord (raw lists, list(set()) skills)."""
+    basic_info = raw_profile.get("basic_info", {})
+    profile_data = {
+        "fullName": basic_info.get("fullname", ""),
+        "headline": basic_info.get("headline", ""),
+        "about": basic_info.get("about", ""),
+        "experience": raw_profile.get("experience", []),
+        "skills": [],
+        "education": raw_profile.get("education", []),
+        "certifications": [],
+    }
+    all_skills = [skill for exp in profile_data["experience"] for skill in exp.get("skills", [])]
+    profile_data["skills"] = list(set(all_skills))
+    return profile_data
+
+
+def measure(build, payloads):
+    tracemalloc.start()
+    before = tracemalloc.take_snapshot()
+    sessions = [build(payload) for payload in payloads]
+    after = tracemalloc.take_snapshot()
+    tracemalloc.stop()
+    total = sum(stat.size_diff for stat in after.compare_to(before, "filename"))
+    return total / len(sessions), sessions
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 500
+    # Each payload is decoded separately, like a fresh scrape or a cache read per session
+    payloads = [json.dumps(raw_apify_item(seed % 50)) for seed in range(count)]
+
+    legacy_bytes, _ = measure(lambda payload: legacy_profile(json.loads(payload)), payloads)
+    record_bytes, records = measure(lambda payload: ProfileRecord.from_apify(json.loads(payload)), payloads)
+
+    print(f"Profile memory per session over {count} sessions")
+    print(f"  raw dict (before) : {legacy_bytes / 1024:.1f} KiB")
+    print(f"  ProfileRecord     : {record_bytes / 1024:.1f} KiB")
+    print(f"  reduction         : {100 * (1 - record_bytes / legacy_bytes):.0f}%")
+
+
+if __name__ == "__main__":
+    main()
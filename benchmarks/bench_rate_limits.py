@@ -0,0 +1,86 @@
+"""
+Exercise the shared rate limiter against a simulated Gemini quota (benchmarks/fakes.FakeQuota).
+A burst of bulk rewrites and interactive chat calls arrives at once, first with every caller
+going straight to the model (as before), then through one PriorityRateLimiter with retries, and
+finally the same with the client's own retries left on (the library default of max_retries=6),
+which bypass the limiter. Reports quota errors, failed calls and latency per priority.
+
+Usage:
+    python benchmarks/bench_rate_limits.py [quota_per_second] [bulk_calls] [chat_calls]
+"""
+import os
+import sys
+import threading
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from fakes import CallRecorder, FakeChatModel, FakeQuota
+from rate_limiter import (PRIORITY_BULK, PRIORITY_INTERACTIVE, PriorityRateLimiter, call_with_retry,
+                          request_priority)
+from run_waiter import BackoffPolicy
+
+
+def percentile(values, pct):
+    ordered = sorted(values)
+    return ordered[max(0, min(len(ordered) - 1, int(round(pct / 100 * len(ordered))) - 1))] if ordered else float("nan")
+
+
+def run(label, quota_per_second, bulk_calls, chat_calls, limited, client_retries=1):
+    recorder = CallRecorder()
+    quota = FakeQuota(quota_per_second, window=1.0, recorder=recorder, name="quota")
+    limiter = PriorityRateLimiter("gemini", "bench", requests_per_minute=quota_per_second * 60 * 0.9, burst=2) if limited else None
+    llm = FakeChatModel(first_token_latency=0.05, generation_latency=0.05, response_tokens=20, quota=quota,
+                        rate_limiter=limiter, max_retries=client_retries, recorder=recorder)
+    policy = BackoffPolicy(initial_delay=0.2, max_delay=2.0, jitter=0.5, deadline=30.0)
+
+    def call(kind, priority, index):
+        start = time.perf_counter()
+        with request_priority(priority):
+            try:
+                if limited:
+                    call_with_retry(lambda: llm.invoke(f"{kind} {index}"), limiter, policy=policy)
+                else:
+                    llm.invoke(f"{kind} {index}")
+                recorder.sample(f"{kind}.latency", time.perf_counter() - start)
+            except Exception:
+                recorder.count(f"{kind}.failed")
+
+    threads = [threading.Thread(target=call, args=("bulk", PRIORITY_BULK, i)) for i in range(bulk_calls)]
+    for thread in threads:
+        thread.start()
+    time.sleep(0.05)  # Chat arrives while the bulk rewrites are already queued
+    chat = [threading.Thread(target=call, args=("chat", PRIORITY_INTERACTIVE, i)) for i in range(chat_calls)]
+    for thread in chat:
+        thread.start()
+    start = time.perf_counter()
+    for thread in threads + chat:
+        thread.join()
+    wall = time.perf_counter() - start
+
+    print(f"{label} ({wall:.1f}s)")
+    print(f"  quota errors from the provider: {recorder.counts.get('quota.rejected', 0)}"
+          f" ({recorder.counts.get('llm.client_retries', 0)} client-side retries past the limiter)")
+    for kind, total in (("chat", chat_calls), ("bulk", bulk_calls)):
+        latency = recorder.samples.get(f"{kind}.latency", [])
+        print(f"  {kind:<5} ok {len(latency):3d}/{total:<3d} failed {recorder.counts.get(f'{kind}.failed', 0):3d}   "
+              f"p50 {percentile(latency, 50):6.2f}s  p95 {percentile(latency, 95):6.2f}s")
+
+
+def main():
+    quota_per_second = int(sys.argv[1]) if len(sys.argv) > 1 else 5
+    bulk_calls = int(sys.argv[2]) if len(sys.argv) > 2 else 30
+    chat_calls = int(sys.argv[3]) if len(sys.argv) > 3 else 5
+    print(f"Simulated quota: {quota_per_second} requests/s; {bulk_calls} bulk rewrites + {chat_calls} chat calls at once\n")
+    run("Uncoordinated (each caller straight to the model)", quota_per_second, bulk_calls, chat_calls, limited=False)
+    time.sleep(1.1)  # Let the quota window reset
+    run("Shared limiter with priorities and retries", quota_per_second, bulk_calls, chat_calls, limited=True)
+    time.sleep(1.1)
+    run("Shared limiter, client retries left on (max_retries=6)", quota_per_second, bulk_calls, chat_calls,
+        limited=True, client_retries=6)
+
+
+if __name__ == "__main__":
+    main()
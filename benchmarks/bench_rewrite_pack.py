@@ -0,0 +1,73 @@
+"""
+Time a rewrite pack (every profile section x every target role) generated one call at a time
+with rewrite_profile_section against rewrite_profile_sections, which batches the grid under a
+concurrency limit. Gemini is replaced by the stand-in from benchmarks/fakes.py.
+
+Usage:
+    python benchmarks/bench_rewrite_pack.py [roles] [latency_seconds] [max_concurrency]
+"""
+import os
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+os.environ["GOOGLE_API_KEY"] = "benchmark-placeholder-key"
+os.environ["RESPONSE_CACHE_PATH"] = ""
+# Measure the app itself here; bench_rate_limits.py covers quota behaviour
+os.environ.setdefault("GEMINI_RPM", "100000")
+os.environ.setdefault("APIFY_RPM", "100000")
+
+from fakes import CallRecorder, FakeChatModel
+import content_generator
+import llm_client
+
+SECTIONS = {
+    "headline": "Data Analyst | Excel | SQL",
+    "about": "I turn messy spreadsheets into clear dashboards and enjoy learning new tools. " * 3,
+    "experience": "Built weekly sales reports in Excel and SQL for the regional team at Acme Corp.",
+}
+ROLES = ["Data Scientist", "Machine Learning Engineer", "Data Engineer", "Business Analyst",
+         "Product Analyst", "Analytics Engineer", "BI Developer", "Statistician"]
+
+
+def main():
+    roles = int(sys.argv[1]) if len(sys.argv) > 1 else 4
+    latency = float(sys.argv[2]) if len(sys.argv) > 2 else 0.5
+    concurrency = int(sys.argv[3]) if len(sys.argv) > 3 else 8
+    recorder = CallRecorder()
+    llm_client.ChatGoogleGenerativeAI = lambda model, temperature, **kwargs: FakeChatModel(
+        first_token_latency=latency / 2, generation_latency=latency / 2, response_tokens=60, recorder=recorder, **kwargs
+    )
+    llm_client.clear_llm_cache()
+    grid = len(SECTIONS) * roles
+
+    # Different role spellings per run so neither run is served from the other's cached rewrites
+    start = time.perf_counter()
+    for content in SECTIONS.values():
+        for role in ROLES[:roles]:
+            content_generator.rewrite_profile_section(content, f"{role} (serial)")
+    serial = time.perf_counter() - start
+
+    start = time.perf_counter()
+    first = None
+    for _ in content_generator.rewrite_profile_sections(SECTIONS, [f"{role} (batched)" for role in ROLES[:roles]],
+                                                        max_concurrency=concurrency):
+        first = first or time.perf_counter() - start
+    batched = time.perf_counter() - start
+
+    start = time.perf_counter()
+    list(content_generator.rewrite_profile_sections(SECTIONS, [f"{role} (batched)" for role in ROLES[:roles]]))
+    cached = time.perf_counter() - start
+
+    print(f"Rewrite pack: {len(SECTIONS)} sections x {roles} roles = {grid} rewrites, {latency:.2f}s per model call")
+    print(f"  one call at a time      : {serial:6.2f} s")
+    print(f"  batched (concurrency {concurrency:<2}): {batched:6.2f} s (first result after {first:.2f} s)")
+    print(f"  repeated (cached)       : {cached * 1000:6.1f} ms")
+    print(f"  model calls             : {recorder.counts.get('llm.calls', 0)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,63 @@
+"""
+Measure re-analysis after a profile edit: a cold section-level analysis of a profile, then the
+same profile with one section changed, where only that section's analysis and suggestions go
+back to the model. Gemini is replaced by the stand-in from benchmarks/fakes.py.
+
+Usage:
+    python benchmarks/bench_section_reanalysis.py [latency_seconds]
+"""
+import os
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+os.environ["GOOGLE_API_KEY"] = "benchmark-placeholder-key"
+os.environ["RESPONSE_CACHE_PATH"] = ""
+# Measure the app itself here; bench_rate_limits.py covers quota behaviour
+os.environ.setdefault("GEMINI_RPM", "100000")
+os.environ.setdefault("APIFY_RPM", "100000")
+
+from fakes import CallRecorder, FakeChatModel, fake_apify_item
+from profile_record import ProfileRecord
+import llm_client
+import section_analyzer
+
+
+def timed(profile, recorder):
+    calls = recorder.counts.get("llm.calls", 0)
+    tokens = sum(recorder.samples.get("llm.prompt_tokens", []))
+    start = time.perf_counter()
+    result = section_analyzer.analyze_profile_sections(profile)
+    elapsed = time.perf_counter() - start
+    return (elapsed, recorder.counts.get("llm.calls", 0) - calls,
+            sum(recorder.samples.get("llm.prompt_tokens", [])) - tokens, result)
+
+
+def main():
+    latency = float(sys.argv[1]) if len(sys.argv) > 1 else 0.5
+    recorder = CallRecorder()
+    llm_client.ChatGoogleGenerativeAI = lambda model, temperature, **kwargs: FakeChatModel(
+        first_token_latency=latency / 2, generation_latency=latency / 2, response_tokens=150, recorder=recorder, **kwargs
+    )
+    llm_client.clear_llm_cache()
+
+    profile = ProfileRecord.from_apify(fake_apify_item("section-bench-user"))
+    edited = profile.to_dict()
+    edited["headline"] = "Senior Data Scientist | Python | MLOps"
+
+    rows = [
+        ("cold analysis", timed(profile, recorder)),
+        ("unchanged re-run", timed(profile, recorder)),
+        ("one section edited", timed(ProfileRecord.from_dict(edited), recorder)),
+    ]
+    print(f"Section-level analysis, {latency:.2f}s per model call")
+    for label, (elapsed, calls, tokens, result) in rows:
+        print(f"  {label:<20} {elapsed:6.2f} s  {calls:3d} model calls  ~{tokens:5d} prompt tokens  "
+              f"({result['cached']} cached, {result['fresh']} fresh units)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,253 @@
+"""
+Local stand-ins for ApifyClient and the Gemini chat model, with configurable latency, failure
+rate, payload size and quota, so the analyze and chat flows can be measured without tokens or quota.
+"""
+from collections import deque
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage, AIMessageChunk
+from langchain_core.outputs import ChatGeneration, ChatGenerationChunk, ChatResult
+from typing import Any
+import random
+import threading
+import time
+import uuid
+
+WORDS = ("profile", "experience", "skills", "headline", "impact", "python", "leadership", "results",
+         "project", "certification", "keywords", "recruiters", "achievements", "role", "growth")
+
+
+class CallRecorder:
+    """Thread-safe counters and samples shared by the fakes and the benchmark driver."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.counts = {}
+        self.samples = {}
+
+    def count(self, name, amount=1):
+        with self._lock:
+            self.counts[name] = self.counts.get(name, 0) + amount
+
+    def sample(self, name, value):
+        with self._lock:
+            self.samples.setdefault(name, []).append(value)
+
+
+class QuotaExceeded(RuntimeError):
+    """Simulated provider quota error; carries a 429 status like the real client errors."""
+    status_code = 429
+
+
+class FakeQuota:
+    """
+    Provider-side quota: at most `limit` requests in any `window` seconds, shared by every fake
+    client given the same instance. Requests over the limit fail with QuotaExceeded.
+    """
+
+    def __init__(self, limit, window=60.0, recorder=None, name="quota"):
+        self.limit = limit
+        self.window = window
+        self.recorder = recorder
+        self.name = name
+        self._lock = threading.Lock()
+        self._calls = deque()
+
+    def check(self):
+        now = time.monotonic()
+        with self._lock:
+            while self._calls and now - self._calls[0] >= self.window:
+                self._calls.popleft()
+            if len(self._calls) >= self.limit:
+                if self.recorder:
+                    self.recorder.count(f"{self.name}.rejected")
+                raise QuotaExceeded(f"429 Resource has been exhausted (simulated {self.name}: {self.limit} per {self.window:.0f}s)")
+            self._calls.append(now)
+            if self.recorder:
+                self.recorder.count(f"{self.name}.accepted")
+
+
+def fake_apify_item(username, experience_entries=5, description_chars=400, rng=None):
+    """A dataset item shaped like the apimaestro batch scraper's output."""
+    rng = rng or random.Random(username)
+    description = " ".join(rng.choice(WORDS) for _ in range(description_chars // 8))[:description_chars]
+    return {
+        "basic_info": {
+            "fullname": username.replace("-", " ").title(),
+            "headline": "Data Scientist | Python | Machine Learning",
+            "about": description,
+            "public_identifier": username,
+        },
+        "experience": [
+            {
+                "title": f"Engineer {i}",
+                "company": rng.choice(["Acme Corp", "Globex", "Initech"]),
+                "company_logo_url": "https://media.licdn.com/dms/image/" + "x" * 120,
+                "location": "Pune, India",
+                "start_date": {"year": 2015 + i, "month": "Jan"},
+                "end_date": {"year": 2016 + i, "month": "Dec"},
+                "description": description,
+                "skills": rng.sample(["Python", "SQL", "Pandas", "Docker", "AWS", "Statistics", "Tableau"], 3),
+            }
+            for i in range(experience_entries)
+        ],
+        "education": [{"school": "University of Pune", "degree": "B.E.", "field_of_study": "Computer Engineering",
+                       "start_date": {"year": 2011}, "end_date": {"year": 2015}}],
+    }
+
+
+class _ListPage:
+    def __init__(self, items):
+        self.items = items
+
+
+class _FakeRun:
+    def __init__(self, usernames, run_seconds, config):
+        self.id = uuid.uuid4().hex[:12]
+        self.started = time.monotonic()
+        self.run_seconds = run_seconds
+        self.aborted = False
+        self.items = [fake_apify_item(name, config["experience_entries"], config["description_chars"])
+                      for name in usernames]
+
+    def remaining(self):
+        return max(0.0, self.started + self.run_seconds - time.monotonic())
+
+    def as_dict(self):
+        status = "ABORTED" if self.aborted else "SUCCEEDED" if self.remaining() == 0 else "RUNNING"
+        return {"id": self.id, "status": status, "defaultDatasetId": self.id}
+
+
+class FakeApifyClient:
+    """
+    Mirrors the parts of the apify-client 2.x API the scraper uses: actor().start(),
+    run().wait_for_finish() and dataset().list_items(). Items appear when the run finishes.
+    """
+
+    def __init__(self, token=None, run_seconds=1.0, failure_rate=0.0, experience_entries=5,
+                 description_chars=400, recorder=None, runs=None, quota=None):
+        self.run_seconds = run_seconds
+        self.quota = quota
+        self.failure_rate = failure_rate
+        self.config = {"experience_entries": experience_entries, "description_chars": description_chars}
+        self.recorder = recorder or CallRecorder()
+        self.runs = runs if runs is not None else {}
+
+    def actor(self, name):
+        client = self
+
+        class _Actor:
+            def start(self, run_input=None, **kwargs):
+                client.recorder.count("apify.actor_start")
+                if client.quota:
+                    client.quota.check()
+                if random.random() < client.failure_rate:
+                    client.recorder.count("apify.failures")
+                    raise RuntimeError("Simulated Apify failure (402 Payment Required)")
+                run = _FakeRun(run_input["usernames"], client.run_seconds, client.config)
+                client.runs[run.id] = run
+                return dict(run.as_dict(), status="READY")
+
+        return _Actor()
+
+    def run(self, run_id):
+        run = self.runs[run_id]
+        recorder = self.recorder
+
+        class _RunClient:
+            def get(self):
+                return run.as_dict()
+
+            def abort(self):
+                recorder.count("apify.abort")
+                run.aborted = True
+                return run.as_dict()
+
+            def wait_for_finish(self, wait_secs=None):
+                recorder.count("apify.wait_for_finish")
+                time.sleep(min(run.remaining(), wait_secs if wait_secs is not None else run.remaining()))
+                return run.as_dict()
+
+        return _RunClient()
+
+    def dataset(self, dataset_id):
+        run = self.runs[dataset_id]
+        recorder = self.recorder
+
+        class _Dataset:
+            def list_items(self, offset=None, limit=None, **kwargs):
+                recorder.count("apify.dataset_polls")
+                items = run.items if run.remaining() == 0 and not run.aborted else []
+                offset = offset or 0
+                return _ListPage(items[offset:offset + limit if limit else None])
+
+        return _Dataset()
+
+
+class FakeChatModel(BaseChatModel):
+    """
+    Chat model stand-in: waits first_token_latency, then streams response_tokens words spread over
+    generation_latency seconds. Records prompt sizes and fails with a simulated 429 at failure_rate,
+    or when a shared FakeQuota is exhausted. Like the real client, quota errors are retried
+    internally up to max_retries attempts in total (1 = no retries), without going back
+    through the rate limiter.
+    """
+    first_token_latency: float = 0.2
+    generation_latency: float = 0.5
+    failure_rate: float = 0.0
+    response_tokens: int = 200
+    recorder: Any = None
+    quota: Any = None
+    max_retries: int = 1
+    retry_delay: float = 0.05
+
+    @property
+    def _llm_type(self):
+        return "fake-gemini"
+
+    def bind_tools(self, tools, **kwargs):
+        return self  # The stand-in never calls tools
+
+    def _record(self, messages):
+        if self.quota is not None:
+            for attempt in range(max(1, self.max_retries)):
+                try:
+                    self.quota.check()
+                    break
+                except QuotaExceeded:
+                    if attempt + 1 >= max(1, self.max_retries):
+                        raise
+                    if self.recorder is not None:
+                        self.recorder.count("llm.client_retries")
+                    time.sleep(self.retry_delay * 2 ** attempt)
+        recorder = self.recorder
+        if recorder is None:
+            return
+        chars = sum(len(m.content) if isinstance(m.content, str) else len(str(m.content)) for m in messages)
+        recorder.count("llm.calls")
+        recorder.sample("llm.prompt_messages", len(messages))
+        recorder.sample("llm.prompt_tokens", (chars + 3) // 4)
+        if random.random() < self.failure_rate:
+            recorder.count("llm.failures")
+            raise RuntimeError("429 Resource has been exhausted (simulated)")
+
+    def _words(self):
+        rng = random.Random()
+        return [rng.choice(WORDS) for _ in range(self.response_tokens)]
+
+    def _generate(self, messages, stop=None, run_manager=None, **kwargs):
+        self._record(messages)
+        time.sleep(self.first_token_latency + self.generation_latency)
+        return ChatResult(generations=[ChatGeneration(message=AIMessage(content=" ".join(self._words())))])
+
+    def _stream(self, messages, stop=None, run_manager=None, **kwargs):
+        self._record(messages)
+        time.sleep(self.first_token_latency)
+        words = self._words()
+        delay = self.generation_latency / max(1, len(words))
+        for index, word in enumerate(words):
+            if index:
+                time.sleep(delay)
+            chunk = ChatGenerationChunk(message=AIMessageChunk(content=word + " "))
+            if run_manager:
+                run_manager.on_llm_new_token(chunk.text, chunk=chunk)
+            yield chunk
@@ -0,0 +1,154 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+
+
+class SQLiteCache:
+    """
+    Small on-disk key/value cache with a TTL and size-bounded LRU eviction.
+    Values must be JSON-serializable. Safe to share across threads (Streamlit
+    runs every session in its own thread).
+    """
+
+    def __init__(self, path, ttl_seconds=86400, max_entries=1000, table="cache"):
+        """
+        Args:
+            path (str): SQLite file path (":memory:" for a process-local cache)
+            ttl_seconds (float): Entry lifetime in seconds; 0 or None disables expiry
+            max_entries (int): Maximum number of entries kept before evicting least recently used ones
+            table (str): Table name, so several caches can share one file
+        """
+        if path != ":memory:":
+            directory = os.path.dirname(os.path.abspath(path))
+            os.makedirs(directory, exist_ok=True)
+        self.path = path
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.table = table
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            f"CREATE TABLE IF NOT EXISTS {table} ("
+            "key TEXT PRIMARY KEY, value TEXT NOT NULL, "
+            "created_at REAL NOT NULL, accessed_at REAL NOT NULL)"
+        )
+        self._conn.execute(f"CREATE INDEX IF NOT EXISTS {table}_accessed ON {table} (accessed_at)")
+        self._conn.commit()
+
+    def _is_expired(self, created_at, now):
+        return bool(self.ttl_seconds) and now - created_at > self.ttl_seconds
+
+    def get(self, key):
+        """
+        Look up a key.
+        Args:
+            key (str): Cache key
+        Returns:
+            The cached value, or None on a miss or expired entry
+        """
+        entry = self.get_entry(key)
+        return None if entry is None else entry[0]
+
+    def get_entry(self, key):
+        """
+        Look up a key along with when it was stored, e.g. so a faster tier can keep the same expiry.
+        Args:
+            key (str): Cache key
+        Returns:
+            tuple: (value, created_at timestamp), or None on a miss or expired entry
+        """
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                f"SELECT value, created_at FROM {self.table} WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            value, created_at = row
+            if self._is_expired(created_at, now):
+                self._conn.execute(f"DELETE FROM {self.table} WHERE key = ?", (key,))
+                self._conn.commit()
+                self.misses += 1
+                return None
+            self._conn.execute(f"UPDATE {self.table} SET accessed_at = ? WHERE key = ?", (now, key))
+            self._conn.commit()
+            self.hits += 1
+        return json.loads(value), created_at
+
+    def set(self, key, value):
+        """
+        Store a value, evicting the least recently used entries beyond max_entries.
+        Args:
+            key (str): Cache key
+            value: JSON-serializable value
+        """
+        now = time.time()
+        payload = json.dumps(value, separators=(",", ":"))
+        with self._lock:
+            self._conn.execute(
+                f"INSERT OR REPLACE INTO {self.table} (key, value, created_at, accessed_at) VALUES (?, ?, ?, ?)",
+                (key, payload, now, now),
+            )
+            if self.max_entries:
+                count = self._conn.execute(f"SELECT COUNT(*) FROM {self.table}").fetchone()[0]
+                overflow = count - self.max_entries
+                if overflow > 0:
+                    self._conn.execute(
+                        f"DELETE FROM {self.table} WHERE key IN "
+                        f"(SELECT key FROM {self.table} ORDER BY accessed_at ASC LIMIT ?)",
+                        (overflow,),
+                    )
+                    self.evictions += overflow
+            self._conn.commit()
+
+    def delete(self, key):
+        """Remove a single key if present."""
+        with self._lock:
+            self._conn.execute(f"DELETE FROM {self.table} WHERE key = ?", (key,))
+            self._conn.commit()
+
+    def purge_expired(self):
+        """
+        Drop every expired entry.
+        Returns:
+            int: Number of entries removed
+        """
+        if not self.ttl_seconds:
+            return 0
+        cutoff = time.time() - self.ttl_seconds
+        with self._lock:
+            cursor = self._conn.execute(f"DELETE FROM {self.table} WHERE created_at < ?", (cutoff,))
+            self._conn.commit()
+            return cursor.rowcount
+
+    def clear(self):
+        """Remove every entry and reset the counters."""
+        with self._lock:
+            self._conn.execute(f"DELETE FROM {self.table}")
+            self._conn.commit()
+            self.hits = self.misses = self.evictions = 0
+
+    def __len__(self):
+        with self._lock:
+            return self._conn.execute(f"SELECT COUNT(*) FROM {self.table}").fetchone()[0]
+
+    def stats(self):
+        """
+        Returns:
+            dict: Hit/miss/eviction counters, hit rate and current size
+        """
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "size": len(self),
+        }
@@ -0,0 +1,145 @@
+"""
+In-memory agent checkpointer shared by every Streamlit session. Memory per session stays flat on
+long chats: each thread keeps only its latest checkpoint, the stored message list is capped, and
+least recently used threads are evicted so abandoned browser sessions do not stay in memory.
+"""
+from collections import OrderedDict
+from langchain_core.messages import HumanMessage
+from langgraph.checkpoint.memory import InMemorySaver
+from context_builder import CONTEXT_MESSAGE_NAME
+import threading
+
+
+def trim_messages(messages, max_messages):
+    """
+    Keep the newest whole turns of a conversation within max_messages, plus the latest profile
+    context message. A kept window always starts at a user message, so tool calls are never
+    separated from their results. Older turns live on in the context builder's rolling summary.
+    Args:
+        messages (list): Agent state messages, oldest first
+        max_messages (int): Messages kept, not counting the context message
+    Returns:
+        list: The messages to store
+    """
+    context = [m for m in messages if getattr(m, "name", None) == CONTEXT_MESSAGE_NAME][-1:]
+    conversation = [m for m in messages if getattr(m, "name", None) != CONTEXT_MESSAGE_NAME]
+    if len(conversation) <= max_messages:
+        return messages
+    start = len(conversation) - max_messages
+    while start < len(conversation) and not isinstance(conversation[start], HumanMessage):
+        start += 1
+    if start == len(conversation):
+        start = len(conversation) - max_messages  # One turn longer than the cap; keep its tail
+    return context + conversation[start:]
+
+
+class BoundedMemorySaver(InMemorySaver):
+    """
+    InMemorySaver that keeps only the latest checkpoint (and its pending writes) per thread,
+    stores at most max_messages conversation messages per thread, and keeps at most max_threads
+    threads, evicting the least recently used (read or written) ones. Safe to share across threads.
+    Earlier checkpoints are not kept, so threads cannot be replayed or forked from past steps;
+    resuming a failed run from its latest checkpoint still works.
+    """
+
+    def __init__(self, max_threads=5000, max_messages=200):
+        """
+        Args:
+            max_threads (int): Threads kept before evicting least recently used ones; 0 or None for no limit
+            max_messages (int): Conversation messages stored per thread; 0 or None for no limit
+        """
+        super().__init__()
+        self.max_threads = max_threads
+        self.max_messages = max_messages
+        self.trimmed_messages = 0
+        self.evicted_threads = 0
+        self._lock = threading.RLock()
+        # thread_id -> keys of its channel blobs, least recently used first
+        self._threads = OrderedDict()
+
+    def _touch(self, thread_id):
+        """Mark a thread as recently used. Caller holds the lock."""
+        self._threads.setdefault(thread_id, set())
+        self._threads.move_to_end(thread_id)
+
+    def _evict(self):
+        """Drop least recently used threads beyond max_threads. Caller holds the lock."""
+        while self.max_threads and len(self._threads) > self.max_threads:
+            self.delete_thread(next(iter(self._threads)))
+            self.evicted_threads += 1
+
+    def get_tuple(self, config):
+        with self._lock:
+            self._touch(config["configurable"]["thread_id"])
+            return super().get_tuple(config)
+
+    def list(self, config, *, filter=None, before=None, limit=None):
+        # Materialized under the lock so concurrent writes cannot change the dicts mid-iteration
+        with self._lock:
+            return iter([*super().list(config, filter=filter, before=before, limit=limit)])
+
+    def put(self, config, checkpoint, metadata, new_versions):
+        thread_id = config["configurable"]["thread_id"]
+        checkpoint_ns = config["configurable"]["checkpoint_ns"]
+        messages = checkpoint["channel_values"].get("messages")
+        if self.max_messages and "messages" in new_versions and isinstance(messages, list):
+            trimmed = trim_messages(messages, self.max_messages)
+            if len(trimmed) < len(messages):
+                # The running graph keeps its own copy; only what is stored is trimmed
+                checkpoint = {**checkpoint, "channel_values": {**checkpoint["channel_values"], "messages": trimmed}}
+                self.trimmed_messages += len(messages) - len(trimmed)
+        with self._lock:
+            saved = super().put(config, checkpoint, metadata, new_versions)
+            self._touch(thread_id)
+            blob_keys = self._threads[thread_id]
+            blob_keys.update((thread_id, checkpoint_ns, channel, version) for channel, version in new_versions.items())
+            self._keep_latest(thread_id, checkpoint_ns, checkpoint, blob_keys)
+            self._evict()
+            return saved
+
+    def _keep_latest(self, thread_id, checkpoint_ns, checkpoint, blob_keys):
+        """Drop every checkpoint of a namespace but the one just saved. Caller holds the lock."""
+        checkpoints = self.storage[thread_id][checkpoint_ns]
+        for checkpoint_id in [key for key in checkpoints if key != checkpoint["id"]]:
+            del checkpoints[checkpoint_id]
+            self.writes.pop((thread_id, checkpoint_ns, checkpoint_id), None)
+        # Unchanged channels point at blobs written by earlier checkpoints, so keep what is referenced
+        referenced = {(thread_id, checkpoint_ns, channel, version)
+                      for channel, version in checkpoint["channel_versions"].items()}
+        stale = [key for key in blob_keys if key[1] == checkpoint_ns and key not in referenced]
+        for key in stale:
+            self.blobs.pop(key, None)
+            blob_keys.discard(key)
+
+    def put_writes(self, config, writes, task_id, task_path=""):
+        thread_id = config["configurable"]["thread_id"]
+        checkpoint_ns = config["configurable"].get("checkpoint_ns", "")
+        with self._lock:
+            if config["configurable"]["checkpoint_id"] not in self.storage.get(thread_id, {}).get(checkpoint_ns, {}):
+                return  # Late writes for a checkpoint that was already superseded or evicted
+            super().put_writes(config, writes, task_id, task_path)
+
+    def delete_thread(self, thread_id):
+        """Delete a thread's checkpoints, pending writes and channel blobs."""
+        with self._lock:
+            blob_keys = self._threads.pop(thread_id, set())
+            for checkpoint_ns, checkpoints in self.storage.pop(thread_id, {}).items():
+                for checkpoint_id in checkpoints:
+                    self.writes.pop((thread_id, checkpoint_ns, checkpoint_id), None)
+            for key in blob_keys:
+                self.blobs.pop(key, None)
+
+    def stats(self):
+        """
+        Returns:
+            dict: Stored threads, checkpoints and channel blobs, plus trim/eviction counters
+        """
+        with self._lock:
+            return {
+                "threads": len(self._threads),
+                "checkpoints": sum(len(checkpoints) for namespaces in self.storage.values()
+                                   for checkpoints in namespaces.values()),
+                "blobs": len(self.blobs),
+                "trimmed_messages": self.trimmed_messages,
+                "evicted_threads": self.evicted_threads,
+            }
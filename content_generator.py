@@ -1,9 +1,37 @@
-from langchain_google_genai import ChatGoogleGenerativeAI
+from llm_client import DEFAULT_MODEL, DEFAULT_TEMPERATURE, get_retrying_llm, invoke_with_retry
+from rate_limiter import PRIORITY_BULK, request_priority
+from response_cache import get_response_cache, make_key, normalize_text
+from telemetry import context_isolated, span
 from dotenv import load_dotenv
+import hashlib
 import os
 
 load_dotenv()
 
+# Bump whenever the rewrite prompt changes so cached rewrites from the old prompt are not reused
+REWRITE_PROMPT_VERSION = "v1"
+# Model calls in flight at once when rewriting a section x role grid
+REWRITE_MAX_CONCURRENCY = int(os.environ.get("REWRITE_MAX_CONCURRENCY", 8))
+
+
+def _rewrite_key(section, job_role):
+    section_hash = hashlib.sha256(normalize_text(section).encode("utf-8")).hexdigest()
+    return make_key(section_hash, normalize_text(job_role).lower(), DEFAULT_MODEL, DEFAULT_TEMPERATURE, REWRITE_PROMPT_VERSION)
+
+
+def _rewrite_prompt(section, job_role):
+    return f"Rewrite this LinkedIn section for the job role of {job_role}: {section}"
+
+
+def _rewrite_fallback(section, job_role, error):
+    return f"Rewritten {section} tailored for {job_role} with industry keywords. (Error: {str(error)})"
+
+
+def _usage(response):
+    usage = getattr(response, "usage_metadata", None) or {}
+    return usage.get("input_tokens", 0), usage.get("output_tokens", 0)
+
+
 def rewrite_profile_section(section, job_role):
     """
     Rewrite a profile section to align with a specific job role.
@@ -13,10 +41,76 @@ def rewrite_profile_section(section, job_role):
     Returns:
         str: Rewritten content
     """
-    try:
-        llm = ChatGoogleGenerativeAI(model="gemini-2.0-flash", temperature=0.7)
-        prompt = f"Rewrite this LinkedIn section for the job role of {job_role}: {section}"
-        rewritten = llm.invoke(prompt).content
-        return rewritten
-    except Exception as e:
-        return f"Rewritten {section} tailored for {job_role} with industry keywords. (Error: {str(e)})"
+    with span("tool.rewrite_profile_section", job_role=job_role) as traced:
+        try:
+            # Identical requests are answered from the response cache without calling the model
+            key = _rewrite_key(section, job_role)
+            cache = get_response_cache()
+            cached = cache.get(key)
+            traced.set(cache_hit=cached is not None)
+            if cached is not None:
+                return cached
+
+            # Quota and server errors are retried with backoff before falling back to the error text
+            response = invoke_with_retry(_rewrite_prompt(section, job_role))
+            input_tokens, output_tokens = _usage(response)
+            traced.set(input_tokens=input_tokens, output_tokens=output_tokens)
+            rewritten = response.text
+            cache.set(key, rewritten)
+            return rewritten
+        except Exception as e:
+            traced.status = "error"
+            traced.set(error=type(e).__name__)
+            return _rewrite_fallback(section, job_role, e)
+
+
+@context_isolated
+def rewrite_profile_sections(sections, job_roles, max_concurrency=None):
+    """
+    Rewrite every section for every job role in one go. Cached rewrites are returned straight
+    away; the rest of the section x role grid goes through the chat model's batch interface
+    with at most max_concurrency calls in flight, so a full rewrite pack takes about as long as
+    its slowest call.
+    Args:
+        sections (dict): Section name -> content (e.g. {"headline": "...", "about": "..."})
+        job_roles (list): Target job roles
+        max_concurrency (int): Model calls in flight at once (defaults to REWRITE_MAX_CONCURRENCY)
+    Yields:
+        tuple: (section name, job role, rewritten content) as each rewrite finishes
+    """
+    cache = get_response_cache()
+    pending = {}  # Cache key -> grid cells sharing that rewrite (e.g. a role listed twice)
+    # Bulk work: queued behind interactive chat when the Gemini quota is contended. The priority
+    # lives in this generator's own context (see context_isolated), not the caller's
+    with span("tool.rewrite_profile_sections", sections=len(sections), roles=len(job_roles)) as traced, \
+            request_priority(PRIORITY_BULK):
+        for name, content in sections.items():
+            for job_role in job_roles:
+                key = _rewrite_key(content, job_role)
+                cached = cache.get(key)
+                if cached is not None:
+                    traced.add("cache_hits", 1)
+                    yield name, job_role, cached
+                else:
+                    pending.setdefault(key, []).append((name, content, job_role))
+        if not pending:
+            return
+
+        keys = list(pending)
+        prompts = [_rewrite_prompt(pending[key][0][1], pending[key][0][2]) for key in keys]
+        traced.set(model_calls=len(prompts))
+        llm = get_retrying_llm(DEFAULT_MODEL, DEFAULT_TEMPERATURE)
+        config = {"max_concurrency": max_concurrency or REWRITE_MAX_CONCURRENCY}
+        for index, response in llm.batch_as_completed(prompts, config=config, return_exceptions=True):
+            key = keys[index]
+            if isinstance(response, Exception):
+                traced.add("errors", 1)
+                for name, content, job_role in pending[key]:
+                    yield name, job_role, _rewrite_fallback(content, job_role, response)
+                continue
+            input_tokens, output_tokens = _usage(response)
+            traced.add("input_tokens", input_tokens)
+            traced.add("output_tokens", output_tokens)
+            cache.set(key, response.text)
+            for name, content, job_role in pending[key]:
+                yield name, job_role, response.text
@@ -0,0 +1,256 @@
+from langchain_core.messages import HumanMessage
+from collections import OrderedDict, deque
+import math
+import os
+import re
+import threading
+from telemetry import current_span, logger
+
+# Messages carrying the system prompt and profile summary are tagged with this name so the
+# builder always keeps the most recent one, however long the conversation gets
+CONTEXT_MESSAGE_NAME = "profile_context"
+
+# Profile sections in display order; each can be serialized (and analyzed) on its own
+PROFILE_SECTIONS = ("headline", "about", "experience", "skills", "education", "certifications")
+
+# Fields kept from the raw Apify experience / education entries, in display order
+_EXPERIENCE_FIELDS = ("title", "company", "location", "date_range", "start_date", "end_date", "duration", "description")
+_EDUCATION_FIELDS = ("school", "degree", "degree_name", "field_of_study", "date_range", "start_date", "end_date")
+
+
+def estimate_tokens(text):
+    """
+    Cheap token estimate (about four characters per token for English text), used instead of a
+    count_tokens API round trip on every model call.
+    Args:
+        text (str): Text to measure
+    Returns:
+        int: Estimated token count
+    """
+    return math.ceil(len(text or "") / 4)
+
+
+def _compact_value(value):
+    if isinstance(value, dict):
+        # Date objects from the scraper look like {"year": 2021, "month": "Mar"}
+        return " ".join(str(v) for v in value.values() if v not in (None, "", [], {}))
+    if isinstance(value, list):
+        return ", ".join(_compact_value(v) for v in value if v not in (None, "", [], {}))
+    return re.sub(r"\s+", " ", str(value)).strip()
+
+
+def _compact_entry(entry, fields):
+    if hasattr(entry, "to_dict"):
+        entry = entry.to_dict()  # ExperienceEntry / EducationEntry from profile_record
+    if not isinstance(entry, dict):
+        return _compact_value(entry)
+    values = [_compact_value(entry[field]) for field in fields if entry.get(field)]
+    if not values:
+        values = [_compact_value(v) for v in entry.values() if isinstance(v, (str, int, float)) and v != ""]
+    return " | ".join(v for v in values if v)
+
+
+def serialize_section(profile_data, section):
+    """
+    Serialize one profile section the way serialize_profile writes it.
+    Args:
+        profile_data (dict | ProfileRecord): Profile data from scrape_linkedin_profile
+        section (str): One of PROFILE_SECTIONS
+    Returns:
+        str: Compact section text
+    """
+    if section == "headline":
+        return f"Headline: {profile_data.get('headline') or 'Not provided'}"
+    if section == "about":
+        return f"About/Summary: {_compact_value(profile_data.get('about') or 'Not provided')}"
+    if section == "experience":
+        lines = ["Experiences:"]
+        lines.extend(f"- {_compact_entry(exp, _EXPERIENCE_FIELDS)}" for exp in profile_data.get("experience") or [])
+        return "\n".join(lines)
+    if section == "skills":
+        return f"Skills: {', '.join(profile_data.get('skills') or []) or 'None listed'}"
+    if section == "education":
+        lines = ["Education:"]
+        lines.extend(f"- {_compact_entry(edu, _EDUCATION_FIELDS)}" for edu in profile_data.get("education") or [])
+        return "\n".join(lines)
+    if section == "certifications":
+        certifications = profile_data.get("certifications") or []
+        return f"Certifications: {', '.join(_compact_value(c) for c in certifications) or 'None listed'}"
+    raise ValueError(f"Unknown profile section: {section}")
+
+
+def serialize_profile(profile_data):
+    """
+    Serialize profile data into a compact, prompt-friendly text block: one line per experience and
+    education entry with only the fields the coach needs, instead of indented JSON dumps.
+    Args:
+        profile_data (dict | ProfileRecord): Profile data from scrape_linkedin_profile
+    Returns:
+        str: Compact profile summary
+    """
+    lines = [f"Full Name: {profile_data.get('fullName') or 'Not provided'}"]
+    lines.extend(serialize_section(profile_data, section) for section in PROFILE_SECTIONS)
+    return "\n".join(lines)
+
+
+def extractive_summarizer(previous_summary, messages, max_tokens=400):
+    """
+    Default rolling summarizer: no LLM call, keeps the opening of each older message.
+    Args:
+        previous_summary (str): Summary of even older messages ("" if none)
+        messages (list): Messages being folded into the summary
+        max_tokens (int): Approximate size cap for the summary
+    Returns:
+        str: Updated summary
+    """
+    lines = previous_summary.splitlines() if previous_summary else []
+    for message in messages:
+        text = re.sub(r"\s+", " ", message.text).strip()
+        if not text:
+            continue  # Tool-call-only turns carry no prose
+        role = "User" if isinstance(message, HumanMessage) else "Coach" if message.type == "ai" else "Tool"
+        lines.append(f"{role}: {text[:240]}{'...' if len(text) > 240 else ''}")
+    # Keep the most recent lines within the cap
+    while len(lines) > 1 and estimate_tokens("\n".join(lines)) > max_tokens:
+        lines.pop(0)
+    return "\n".join(lines)
+
+
+class ContextBuilder:
+    """
+    Builds the message list sent to the model on every agent step: the latest profile-context
+    message, a rolling summary of older turns, and as many recent turns as fit in the token budget.
+    The checkpointer keeps the recent conversation (capped per thread); this selects what is sent to the model.
+    """
+
+    def __init__(self, budget_tokens=6000, summary_tokens=400, summarizer=None, token_counter=estimate_tokens):
+        """
+        Args:
+            budget_tokens (int): Maximum estimated prompt tokens per model call
+            summary_tokens (int): Approximate size cap for the rolling summary
+            summarizer (callable): (previous_summary, messages, max_tokens) -> summary; extractive by default
+            token_counter (callable): text -> token count
+        """
+        self.budget_tokens = budget_tokens
+        self.summary_tokens = summary_tokens
+        self.summarizer = summarizer or extractive_summarizer
+        self.count_tokens = token_counter
+        self._lock = threading.Lock()
+        # Rolling summaries keyed by the id of the last message they cover, so each call only
+        # folds in the turns that dropped out of the window since the previous call
+        self._summaries = OrderedDict()
+        self._max_summaries = 1000
+        self.recent_calls = deque(maxlen=500)
+
+    def _tokens(self, message):
+        return self.count_tokens(message.text) + 4  # Small per-message overhead
+
+    def _summarize(self, older):
+        start, summary = 0, ""
+        with self._lock:
+            for index in range(len(older) - 1, -1, -1):
+                cached = self._summaries.get(older[index].id)
+                if cached is not None:
+                    start, summary = index + 1, cached
+                    self._summaries.move_to_end(older[index].id)
+                    break
+        if start < len(older):
+            summary = self.summarizer(summary, older[start:], max_tokens=self.summary_tokens)
+            last_id = older[-1].id
+            if last_id:
+                with self._lock:
+                    self._summaries[last_id] = summary
+                    while len(self._summaries) > self._max_summaries:
+                        self._summaries.popitem(last=False)
+        return summary
+
+    def build(self, state):
+        """
+        Select the messages for one model call. Usable directly as create_react_agent's prompt.
+        Args:
+            state (dict): Agent state with a "messages" list
+        Returns:
+            list: Messages to send to the model
+        """
+        messages = state["messages"] if isinstance(state, dict) else state.messages
+        context_message = None
+        conversation = []
+        for message in messages:
+            if getattr(message, "name", None) == CONTEXT_MESSAGE_NAME:
+                context_message = message  # Only the most recent context is relevant
+            else:
+                conversation.append(message)
+
+        used = self._tokens(context_message) if context_message is not None else 0
+        available = self.budget_tokens - used - self.summary_tokens
+        # Walk back from the newest message, keeping whole turns (a turn starts at a user message,
+        # so tool calls are never separated from their results)
+        window_start = len(conversation)
+        pending = 0
+        for index in range(len(conversation) - 1, -1, -1):
+            pending += self._tokens(conversation[index])
+            # Replies to the context message come before any user turn and form their own group
+            if isinstance(conversation[index], HumanMessage) or index == 0:
+                if pending > available and window_start < len(conversation):
+                    break
+                available -= pending
+                pending = 0
+                window_start = index
+        if window_start == len(conversation):
+            window_start = 0  # No user turn at all; send everything rather than nothing
+        older, window = conversation[:window_start], conversation[window_start:]
+
+        selected = [context_message] if context_message is not None else []
+        if older:
+            summary = self._summarize(older)
+            if summary:
+                selected.append(HumanMessage(content=f"System: Summary of the earlier conversation:\n{summary}"))
+        selected.extend(window)
+
+        tokens = sum(self._tokens(message) for message in selected)
+        stats = {"tokens": tokens, "messages": len(selected), "summarized": len(older), "history": len(messages)}
+        self.recent_calls.append(stats)
+        logger.info(f"Context: ~{tokens} tokens sent ({len(selected)} messages, {len(older)} older messages summarized)")
+        if tokens > self.budget_tokens:
+            # The context message and the newest turn are always sent, even when they alone overflow
+            logger.warning(f"Context: ~{tokens} tokens exceed the {self.budget_tokens}-token budget "
+                           f"(profile context ~{used}, recent turns ~{sum(self._tokens(m) for m in window)})")
+        active = current_span()
+        if active is not None:
+            active.add("prompt_tokens", tokens)
+            active.add("model_calls", 1)
+        return selected
+
+    def stats(self):
+        """
+        Returns:
+            dict: Call count plus average and maximum estimated prompt tokens over recent calls
+        """
+        calls = list(self.recent_calls)
+        tokens = [call["tokens"] for call in calls]
+        return {
+            "calls": len(calls),
+            "avg_tokens": sum(tokens) / len(tokens) if tokens else 0,
+            "max_tokens": max(tokens, default=0),
+            "last": calls[-1] if calls else None,
+        }
+
+
+_builder = None
+_builder_lock = threading.Lock()
+
+
+def get_context_builder():
+    """
+    Return the process-wide context builder, configured via CONTEXT_TOKEN_BUDGET and CONTEXT_SUMMARY_TOKENS.
+    Returns:
+        ContextBuilder: Shared builder
+    """
+    global _builder
+    with _builder_lock:
+        if _builder is None:
+            _builder = ContextBuilder(
+                budget_tokens=int(os.environ.get("CONTEXT_TOKEN_BUDGET", 6000)),
+                summary_tokens=int(os.environ.get("CONTEXT_SUMMARY_TOKENS", 400)),
+            )
+        return _builder
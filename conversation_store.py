@@ -0,0 +1,189 @@
+from langchain_core.messages import AIMessage, HumanMessage
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+
+
+def conversation_id(session_key, profile_key):
+    """
+    Stable, collision-resistant id for one user's conversation about one profile.
+    Args:
+        session_key (str): Browser session key (kept in the page URL so it survives restarts)
+        profile_key (str): Normalized LinkedIn username
+    Returns:
+        str: Hashed conversation id
+    """
+    digest = hashlib.sha256(f"{session_key}\x00{profile_key}".encode("utf-8")).hexdigest()
+    return f"conv_{digest[:32]}"
+
+
+def turns_to_messages(turns):
+    """
+    Convert stored turns into agent messages, e.g. to seed a new agent thread with the
+    conversation so far.
+    Args:
+        turns (list): (sender, content) tuples, oldest first
+    Returns:
+        list: HumanMessage for "You" turns, AIMessage for "Bot" turns
+    """
+    return [HumanMessage(content=content) if sender == "You" else AIMessage(content=content)
+            for sender, content in turns]
+
+
+class ConversationStore:
+    """
+    SQLite-backed chat history shared by every session. Each conversation keeps at most
+    max_turns_per_thread turns (older ones are dropped) and at most max_threads conversations
+    are kept, evicting the least recently used. Turns are read a page at a time, so a session
+    only ever holds what is on screen. Safe to share across threads.
+    """
+
+    def __init__(self, path, max_turns_per_thread=200, max_threads=5000):
+        """
+        Args:
+            path (str): SQLite file path (":memory:" for a process-local store)
+            max_turns_per_thread (int): Turns kept per conversation; 0 or None for no limit
+            max_threads (int): Conversations kept before evicting least recently used ones; 0 or None for no limit
+        """
+        if path != ":memory:":
+            directory = os.path.dirname(os.path.abspath(path))
+            os.makedirs(directory, exist_ok=True)
+        self.path = path
+        self.max_turns_per_thread = max_turns_per_thread
+        self.max_threads = max_threads
+        self.trimmed_turns = 0
+        self.evicted_threads = 0
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA foreign_keys=ON")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS threads ("
+            "thread_id TEXT PRIMARY KEY, created_at REAL NOT NULL, accessed_at REAL NOT NULL)"
+        )
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS turns ("
+            "id INTEGER PRIMARY KEY AUTOINCREMENT, "
+            "thread_id TEXT NOT NULL REFERENCES threads (thread_id) ON DELETE CASCADE, "
+            "sender TEXT NOT NULL, content TEXT NOT NULL, created_at REAL NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS threads_accessed ON threads (accessed_at)")
+        self._conn.execute("CREATE INDEX IF NOT EXISTS turns_thread ON turns (thread_id, id)")
+        self._conn.commit()
+
+    def append(self, thread_id, sender, content):
+        """
+        Add a turn to a conversation, trimming it to max_turns_per_thread and evicting the least
+        recently used conversations beyond max_threads.
+        Args:
+            thread_id (str): Conversation id (see conversation_id())
+            sender (str): "You" or "Bot"
+            content (str): Message text
+        """
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT INTO threads (thread_id, created_at, accessed_at) VALUES (?, ?, ?) "
+                "ON CONFLICT (thread_id) DO UPDATE SET accessed_at = excluded.accessed_at",
+                (thread_id, now, now),
+            )
+            self._conn.execute(
+                "INSERT INTO turns (thread_id, sender, content, created_at) VALUES (?, ?, ?, ?)",
+                (thread_id, sender, content, now),
+            )
+            if self.max_turns_per_thread:
+                cursor = self._conn.execute(
+                    "DELETE FROM turns WHERE thread_id = ? AND id NOT IN "
+                    "(SELECT id FROM turns WHERE thread_id = ? ORDER BY id DESC LIMIT ?)",
+                    (thread_id, thread_id, self.max_turns_per_thread),
+                )
+                self.trimmed_turns += max(cursor.rowcount, 0)
+            if self.max_threads:
+                count = self._conn.execute("SELECT COUNT(*) FROM threads").fetchone()[0]
+                overflow = count - self.max_threads
+                if overflow > 0:
+                    self._conn.execute(
+                        "DELETE FROM threads WHERE thread_id IN "
+                        "(SELECT thread_id FROM threads ORDER BY accessed_at ASC LIMIT ?)",
+                        (overflow,),
+                    )
+                    self.evicted_threads += overflow
+            self._conn.commit()
+
+    def recent(self, thread_id, limit=20):
+        """
+        Load the newest turns of a conversation and mark it as recently used, so conversations
+        that are still being read are not evicted.
+        Args:
+            thread_id (str): Conversation id
+            limit (int): Maximum number of turns to load
+        Returns:
+            list: (sender, content) tuples, oldest first
+        """
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT sender, content FROM turns WHERE thread_id = ? ORDER BY id DESC LIMIT ?",
+                (thread_id, limit),
+            ).fetchall()
+        if rows:
+            self.touch(thread_id)
+        return rows[::-1]
+
+    def count(self, thread_id):
+        """
+        Returns:
+            int: Number of turns stored for a conversation
+        """
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM turns WHERE thread_id = ?", (thread_id,)).fetchone()[0]
+
+    def touch(self, thread_id):
+        """Mark a conversation as recently used so it is not evicted."""
+        with self._lock:
+            self._conn.execute("UPDATE threads SET accessed_at = ? WHERE thread_id = ?", (time.time(), thread_id))
+            self._conn.commit()
+
+    def delete(self, thread_id):
+        """Remove a conversation and all of its turns."""
+        with self._lock:
+            self._conn.execute("DELETE FROM threads WHERE thread_id = ?", (thread_id,))
+            self._conn.commit()
+
+    def stats(self):
+        """
+        Returns:
+            dict: Stored conversations and turns, plus trim/eviction counters
+        """
+        with self._lock:
+            threads = self._conn.execute("SELECT COUNT(*) FROM threads").fetchone()[0]
+            turns = self._conn.execute("SELECT COUNT(*) FROM turns").fetchone()[0]
+        return {
+            "threads": threads,
+            "turns": turns,
+            "trimmed_turns": self.trimmed_turns,
+            "evicted_threads": self.evicted_threads,
+        }
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def get_conversation_store():
+    """
+    Return the process-wide conversation store, creating it on first use.
+    Configured via CONVERSATION_DB_PATH, CONVERSATION_MAX_TURNS and CONVERSATION_MAX_THREADS.
+    Returns:
+        ConversationStore: Shared store
+    """
+    global _store
+    with _store_lock:
+        if _store is None:
+            _store = ConversationStore(
+                os.environ.get("CONVERSATION_DB_PATH", os.path.join(".cache", "conversations.sqlite3")),
+                max_turns_per_thread=int(os.environ.get("CONVERSATION_MAX_TURNS", 200)),
+                max_threads=int(os.environ.get("CONVERSATION_MAX_THREADS", 5000)),
+            )
+        return _store
@@ -1,3 +1,249 @@
+import hashlib
+import json
+import os
+import re
+import threading
+import numpy as np
+from telemetry import span
+
+# Bundled role descriptions, and where the precomputed role x skill matrix is stored
+CORPUS_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "roles.json")
+INDEX_DIR = os.environ.get("JOB_FIT_INDEX_DIR", os.path.join(".cache", "job_fit"))
+MAX_NGRAM = 3
+_TOKEN_RE = re.compile(r"[a-z0-9][a-z0-9+#.&/-]*")
+
+
+def _tokens(text):
+    return [token.rstrip(".,;:/-") for token in _TOKEN_RE.findall(str(text or "").lower())]
+
+
+def _normalize_term(text):
+    return " ".join(_tokens(text))
+
+
+def _flatten_text(value):
+    """Collect every string found in a (possibly nested) profile value."""
+    if isinstance(value, str):
+        return [value]
+    if isinstance(value, dict):
+        return [text for item in value.values() for text in _flatten_text(item)]
+    if isinstance(value, (list, tuple)):
+        return [text for item in value for text in _flatten_text(item)]
+    return []
+
+
+def build_index(corpus_path=CORPUS_PATH, index_dir=INDEX_DIR):
+    """
+    Precompute the TF-IDF weighted role x skill matrix for a role corpus and write it to disk.
+    A role's weight for a skill is 1 if the skill is listed for the role plus 0.5 per mention in
+    its description, scaled by how rare the skill is across roles.
+    Args:
+        corpus_path (str): JSON file with "roles" (title, aliases, skills, description) and "synonyms"
+        index_dir (str): Directory for the .npy matrix and .json metadata
+    Returns:
+        str: Path prefix of the written index files
+    """
+    with open(corpus_path, "rb") as f:
+        raw = f.read()
+    corpus = json.loads(raw)
+    fingerprint = hashlib.sha256(raw).hexdigest()[:16]
+    prefix = os.path.join(index_dir, f"roles_{fingerprint}")
+    if os.path.exists(prefix + ".npy") and os.path.exists(prefix + ".json"):
+        return prefix
+
+    synonyms = {_normalize_term(k): _normalize_term(v) for k, v in corpus.get("synonyms", {}).items()}
+    roles = corpus["roles"]
+    vocabulary = {}
+    for role in roles:
+        for skill in role["skills"]:
+            term = synonyms.get(_normalize_term(skill), _normalize_term(skill))
+            vocabulary.setdefault(term, len(vocabulary))
+
+    matrix = np.zeros((len(roles), len(vocabulary)), dtype=np.float32)
+    for row, role in enumerate(roles):
+        for skill in role["skills"]:
+            term = synonyms.get(_normalize_term(skill), _normalize_term(skill))
+            matrix[row, vocabulary[term]] = 1.0
+        for column in _match_terms(_tokens(role.get("description", "")), vocabulary, synonyms, count=True):
+            matrix[row, column] += 0.5
+    document_frequency = np.count_nonzero(matrix, axis=0)
+    idf = np.log((1 + len(roles)) / (1 + document_frequency)) + 1
+    matrix *= idf.astype(np.float32)
+
+    os.makedirs(index_dir, exist_ok=True)
+    # Write to temporary names first so concurrent builders never see half-written files
+    tmp_suffix = f".{os.getpid()}.{threading.get_ident()}.tmp"
+    with open(prefix + ".npy" + tmp_suffix, "wb") as f:
+        np.save(f, matrix)
+    with open(prefix + ".json" + tmp_suffix, "w", encoding="utf-8") as f:
+        json.dump({
+            "titles": [role["title"] for role in roles],
+            "aliases": [role.get("aliases", []) for role in roles],
+            "vocabulary": list(vocabulary),
+            "synonyms": synonyms,
+        }, f)
+    os.replace(prefix + ".npy" + tmp_suffix, prefix + ".npy")
+    os.replace(prefix + ".json" + tmp_suffix, prefix + ".json")
+    return prefix
+
+
+def _match_terms(tokens, vocabulary, synonyms, count=False, min_length=1):
+    """
+    Find vocabulary terms in a token list by looking up every 1..MAX_NGRAM-gram.
+    Args:
+        tokens (list): Normalized tokens
+        vocabulary (dict): Term -> column index
+        synonyms (dict): Alias -> canonical term
+        count (bool): Return one column per occurrence instead of unique columns
+        min_length (int): Ignore terms shorter than this (single letters like "c" or "r" are too ambiguous in prose)
+    Returns:
+        list: Matched column indices
+    """
+    matches = []
+    for n in range(1, MAX_NGRAM + 1):
+        for start in range(len(tokens) - n + 1):
+            gram = " ".join(tokens[start:start + n])
+            gram = synonyms.get(gram, gram)
+            if len(gram) >= min_length and gram in vocabulary:
+                matches.append(vocabulary[gram])
+    return matches if count else list(dict.fromkeys(matches))
+
+
+class JobFitIndex:
+    """
+    Memory-mapped role x skill matrix. Scoring a profile against every role is one
+    matrix-vector product; the score is the share of a role's skill weight the profile covers.
+    """
+
+    def __init__(self, prefix):
+        """
+        Args:
+            prefix (str): Path prefix returned by build_index()
+        """
+        with open(prefix + ".json", encoding="utf-8") as f:
+            meta = json.load(f)
+        self.titles = meta["titles"]
+        self.vocabulary = {term: column for column, term in enumerate(meta["vocabulary"])}
+        self.terms = meta["vocabulary"]
+        self.synonyms = meta["synonyms"]
+        self.matrix = np.load(prefix + ".npy", mmap_mode="r")
+        self.row_weight = np.asarray(self.matrix.sum(axis=1), dtype=np.float32)
+        self._role_lookup = {}
+        for row, (title, aliases) in enumerate(zip(self.titles, meta["aliases"])):
+            for name in [title, *aliases]:
+                self._role_lookup.setdefault(_normalize_term(name), row)
+
+    def profile_vector(self, profile_data):
+        """
+        Encode a profile as a binary skill vector over the index vocabulary.
+        Args:
+            profile_data (dict | ProfileRecord | str): Profile from the scraper, or free text
+        Returns:
+            numpy.ndarray: float32 vector with 1 for every skill the profile shows
+        """
+        vector = np.zeros(len(self.terms), dtype=np.float32)
+        if hasattr(profile_data, "to_dict"):
+            profile_data = profile_data.to_dict()
+        if isinstance(profile_data, str):
+            try:
+                profile_data = json.loads(profile_data)
+            except ValueError:
+                profile_data = {"about": profile_data}
+        if not isinstance(profile_data, dict):
+            return vector
+        # Explicitly listed skills match whole, even single-letter ones like "R" or "C"
+        for skill in profile_data.get("skills") or []:
+            term = _normalize_term(skill)
+            term = self.synonyms.get(term, term)
+            if term in self.vocabulary:
+                vector[self.vocabulary[term]] = 1.0
+        texts = [profile_data.get("headline"), profile_data.get("about")]
+        for section in ("experience", "education", "certifications"):
+            texts.extend(_flatten_text(profile_data.get(section)))
+        tokens = _tokens(" . ".join(text for text in texts if text))
+        vector[_match_terms(tokens, self.vocabulary, self.synonyms, min_length=2)] = 1.0
+        return vector
+
+    def scores(self, vectors):
+        """
+        Score one or many profile vectors against every role.
+        Args:
+            vectors (numpy.ndarray): (vocabulary,) or (profiles, vocabulary) array from profile_vector()
+        Returns:
+            numpy.ndarray: (roles,) or (profiles, roles) coverage scores between 0 and 1
+        """
+        return (np.asarray(vectors, dtype=np.float32) @ self.matrix.T) / self.row_weight
+
+    def find_role(self, job_role):
+        """
+        Resolve a job role name to a row of the index.
+        Args:
+            job_role (str): Role title or alias, e.g. "ML Engineer"
+        Returns:
+            int: Row index, or None if no catalogue role resembles the name
+        """
+        name = _normalize_term(job_role)
+        if name in self._role_lookup:
+            return self._role_lookup[name]
+        wanted = set(name.split())
+        best_row, best_overlap = None, 0.0
+        for candidate, row in self._role_lookup.items():
+            words = set(candidate.split())
+            overlap = len(wanted & words) / len(wanted | words) if wanted else 0.0
+            if overlap > best_overlap:
+                best_row, best_overlap = row, overlap
+        return best_row if best_overlap >= 0.5 else None
+
+    def missing_skills(self, row, vector, limit=5):
+        """
+        Args:
+            row (int): Role row
+            vector (numpy.ndarray): Profile vector
+            limit (int): Maximum skills returned
+        Returns:
+            list: The role's highest-weighted skills the profile does not show
+        """
+        weights = np.where(vector > 0, 0.0, self.matrix[row])
+        columns = np.argsort(-weights)[:limit]
+        return [self.terms[column] for column in columns if weights[column] > 0]
+
+    def rank(self, profile_data, top_k=5):
+        """
+        Rank every role for a profile.
+        Args:
+            profile_data (dict | str): Profile data
+            top_k (int): Number of roles returned
+        Returns:
+            list: Dicts with role, score (0-100) and missing_skills, best match first
+        """
+        vector = self.profile_vector(profile_data)
+        scores = self.scores(vector)
+        top_k = min(top_k, len(scores))
+        rows = np.argpartition(-scores, top_k - 1)[:top_k]
+        rows = rows[np.argsort(-scores[rows])]
+        return [
+            {"role": self.titles[row], "score": round(100 * float(scores[row])), "missing_skills": self.missing_skills(row, vector)}
+            for row in rows
+        ]
+
+
+_index = None
+_index_lock = threading.Lock()
+
+
+def get_job_fit_index():
+    """
+    Return the process-wide job fit index, building the matrix on first use if it is not on disk yet.
+    Returns:
+        JobFitIndex: Shared index
+    """
+    global _index
+    with _index_lock:
+        if _index is None:
+            _index = JobFitIndex(build_index())
+        return _index
+
+
 def analyze_job_fit(job_role, profile_data):
     """
     Compare user profile with industry-standard job description.
@@ -7,6 +253,23 @@ def analyze_job_fit(job_role, profile_data):
     Returns:
         str: Match score and improvement suggestions
     """
-    match_score = 75
-    suggestions = f"Your profile matches {match_score}% with the role of {job_role}. Consider learning Cloud Computing."
-    return suggestions
+    with span("tool.analyze_job_fit", job_role=job_role) as traced:
+        index = get_job_fit_index()
+        vector = index.profile_vector(profile_data)
+        scores = index.scores(vector)
+        closest = np.argsort(-scores)[:3]
+        closest_text = ", ".join(f"{index.titles[row]} ({round(100 * float(scores[row]))}%)" for row in closest)
+
+        row = index.find_role(job_role)
+        if row is None:
+            traced.set(matched_role=None)
+            return (f"'{job_role}' is not in our role catalogue, so no direct match score is available. "
+                    f"Closest roles for your profile: {closest_text}.")
+        match_score = round(100 * float(scores[row]))
+        traced.set(matched_role=index.titles[row], match_score=match_score)
+        missing = index.missing_skills(row, vector)
+        suggestions = f"Your profile matches {match_score}% with the role of {index.titles[row]}."
+        if missing:
+            suggestions += f" Consider learning or highlighting: {', '.join(missing)}."
+        suggestions += f" Closest roles for your profile: {closest_text}."
+        return suggestions
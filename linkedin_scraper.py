@@ -1,91 +1,485 @@
-from apify_client import ApifyClient
+from apify_client import ApifyClient, ApifyClientAsync
 from dotenv import load_dotenv
+from urllib.parse import unquote, urlparse
+from cache_store import SQLiteCache
+from profile_record import ProfileRecord
+from rate_limiter import acall_with_retry, call_with_retry, get_rate_limiter
+from run_waiter import RunTimer, batch_policy, default_policy, record_run
+from telemetry import debug_json, logger, span
+from concurrent.futures import ThreadPoolExecutor
+import asyncio
 import os
-import json
+import math
+import queue
+import threading
 import time
 
 # Load environment variables
 load_dotenv()
 
-def scrape_linkedin_profile(url):
+# On-disk cache of mapped profiles, keyed by normalized username
+_scrape_cache = None
+_scrape_cache_lock = threading.Lock()
+
+
+def get_scrape_cache():
+    """
+    Return the process-wide scrape cache, creating it on first use.
+    Configured via SCRAPE_CACHE_PATH, SCRAPE_CACHE_TTL (seconds) and SCRAPE_CACHE_MAX_ENTRIES.
+    Returns:
+        SQLiteCache: Shared cache instance
+    """
+    global _scrape_cache
+    with _scrape_cache_lock:
+        if _scrape_cache is None:
+            _scrape_cache = SQLiteCache(
+                os.environ.get("SCRAPE_CACHE_PATH", os.path.join(".cache", "scrape_cache.sqlite3")),
+                ttl_seconds=float(os.environ.get("SCRAPE_CACHE_TTL", 24 * 60 * 60)),
+                max_entries=int(os.environ.get("SCRAPE_CACHE_MAX_ENTRIES", 500)),
+                table="profiles",
+            )
+        return _scrape_cache
+
+
+def normalize_username(url):
+    """
+    Extract a canonical LinkedIn username from a profile URL or bare username.
+    Args:
+        url (str): LinkedIn profile URL (e.g. https://www.linkedin.com/in/jane-doe/?trk=x) or username
+    Returns:
+        str: Lower-cased username, or "" if none could be extracted
+    """
+    url = (url or "").strip()
+    if "://" in url or url.lower().startswith(("www.", "linkedin.")):
+        path = urlparse(url if "://" in url else f"https://{url}").path
+    else:
+        path = url
+    parts = [unquote(part) for part in path.split("/") if part]
+    if "in" in parts and parts.index("in") + 1 < len(parts):
+        username = parts[parts.index("in") + 1]
+    else:
+        username = parts[-1] if parts else ""
+    return username.strip().lower()
+
+
+ACTOR_NAME = "apimaestro/linkedin-profile-batch-scraper-no-cookies-required"
+TERMINAL_RUN_STATUSES = {"SUCCEEDED", "FAILED", "ABORTED", "TIMED-OUT"}
+# Profiles packed into one actor run (dataset pages are DATASET_PAGE_SIZE items)
+DEFAULT_BATCH_SIZE = int(os.environ.get("SCRAPE_BATCH_SIZE", 25))
+# Actor runs in flight at once when scraping a cohort
+BATCH_CONCURRENCY = int(os.environ.get("SCRAPE_BATCH_CONCURRENCY", 3))
+# Dataset items fetched per poll
+DATASET_PAGE_SIZE = 100
+# Longest single server-side wait while a cancellable scrape is running
+CANCEL_CHECK_SECS = 5
+# Extra dataset polls for a run that SUCCEEDED with no items yet (its writes may still be landing)
+EMPTY_RUN_POLLS = 2
+
+
+class ScrapeCancelled(Exception):
+    """Raised when a scrape is cancelled (its actor run is aborted)."""
+
+
+def map_profile(raw_profile):
+    """
+    Map one raw actor dataset item to the structure the app expects, keeping only the fields the app uses.
+    Args:
+        raw_profile (dict): Item from the apimaestro/linkedin-profile-batch-scraper-no-cookies-required dataset
+    Returns:
+        dict: Profile data including About, Experience, Skills, etc.
+    """
+    # Based on the JSON output structure of apimaestro/linkedin-profile-batch-scraper-no-cookies-required;
+    # skills are nested in experience entries and deduplicated in order
+    return ProfileRecord.from_apify(raw_profile).to_dict()
+
+
+def _raw_profile_username(raw_profile):
+    """
+    Work out which requested username a raw dataset item belongs to.
+    Args:
+        raw_profile (dict): Item from the actor dataset
+    Returns:
+        str: Normalized username, or "" if the item carries no identifier
+    """
+    basic_info = raw_profile.get("basic_info", {}) or {}
+    for candidate in (
+        basic_info.get("public_identifier"),
+        basic_info.get("profile_url"),
+        raw_profile.get("profileUrl"),
+        raw_profile.get("username"),
+        raw_profile.get("input"),
+    ):
+        if candidate and isinstance(candidate, str):
+            return normalize_username(candidate)
+    return ""
+
+
+def _abort_run(run_client, run_id):
+    """Abort an actor run that is no longer wanted, so it stops using compute units."""
+    try:
+        run_client.abort()
+    except Exception as e:
+        logger.warning(f"Failed to abort run {run_id}: {str(e)}")
+
+
+def _iter_run_items(client, usernames, page_size=DATASET_PAGE_SIZE, policy=None, cancel_event=None):
+    """
+    Start one actor run for a batch of usernames and yield dataset items page by page
+    while the run produces them, instead of loading the whole dataset at the end.
+    Between polls the run's status is followed with server-side waits that return as soon
+    as the run finishes, backing off exponentially (with jitter) up to an overall deadline.
+    A run that failed, was aborted or timed out ends the scrape once its dataset is drained; a run
+    that succeeded with an empty dataset gets EMPTY_RUN_POLLS short extra polls. A run still going
+    at the deadline is aborted so it stops billing.
+    Args:
+        client (ApifyClient): Authenticated Apify client
+        usernames (list): Usernames to scrape in this run
+        page_size (int): Dataset items fetched per request
+        policy (BackoffPolicy): Wait strategy (defaults to run_waiter.default_policy())
+        cancel_event (threading.Event): When set, the actor run is aborted and ScrapeCancelled raised
+    Yields:
+        dict: Raw dataset items
+    """
+    policy = policy or default_policy()
+    if cancel_event is not None and cancel_event.is_set():
+        raise ScrapeCancelled("Scrape cancelled before the actor run started.")
+    run_input = {
+        "usernames": list(usernames)  # The actor accepts a list of usernames or URLs
+    }
+    # Actor starts share the process-wide Apify limiter. Only quota errors are retried: a start is
+    # not idempotent, and a server error or timeout may come after the run was created
+    run = call_with_retry(
+        lambda: client.actor(ACTOR_NAME).start(run_input=run_input),
+        get_rate_limiter("apify", ACTOR_NAME),
+        acquire=True,
+        retry_on=("quota",),
+    )
+    logger.info(f"Actor run started. Run ID: {run['id']}, Status: {run['status']}, Profiles: {len(usernames)}")
+
+    timer = RunTimer(run["id"], len(usernames))
+    dataset = client.dataset(run["defaultDatasetId"])
+    run_client = client.run(run["id"])
+    deadline = time.monotonic() + policy.deadline
+    delays = policy.delays()
+    offset = 0
+    status = None
+    empty_polls = 0
+    try:
+        while True:
+            if cancel_event is not None and cancel_event.is_set():
+                _abort_run(run_client, run["id"])
+                timer.mark_finished("ABORTED")
+                raise ScrapeCancelled(f"Scrape cancelled; run {run['id']} aborted.")
+            with span("apify.dataset_poll", run_id=run["id"], offset=offset) as poll:
+                items = dataset.list_items(offset=offset, limit=page_size).items
+                poll.set(items=len(items))
+            timer.mark_poll(len(items))
+            offset += len(items)
+            yield from items
+            if len(items) == page_size:
+                continue  # A full page means more may already be waiting
+            if status in TERMINAL_RUN_STATUSES:
+                if offset or status != "SUCCEEDED" or empty_polls >= EMPTY_RUN_POLLS:
+                    return
+                # The run succeeded but its dataset is still empty; give it a moment
+                empty_polls += 1
+                time.sleep(min(policy.initial_delay, max(0.0, deadline - time.monotonic())))
+                continue
+            if items:
+                delays = policy.delays()  # Data is flowing, so poll eagerly again
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                logger.warning(f"Run {run['id']}: deadline of {policy.deadline:.0f}s reached with {offset} items; aborting it.")
+                _abort_run(run_client, run["id"])
+                timer.mark_finished("ABORTED")
+                return
+            delay = min(next(delays), remaining)
+            wait_secs = max(1, math.ceil(delay))
+            if cancel_event is not None:
+                wait_secs = min(wait_secs, CANCEL_CHECK_SECS)  # Keep cancellation responsive
+            with span("apify.wait_for_finish", run_id=run["id"]):
+                run_info = run_client.wait_for_finish(wait_secs=wait_secs)
+            status = (run_info or {}).get("status")
+            if status in TERMINAL_RUN_STATUSES:
+                timer.mark_finished(status)  # Loop once more to drain whatever the run wrote
+    finally:
+        record_run(timer)
+
+
+async def _aiter_run_items(client, usernames, page_size=DATASET_PAGE_SIZE, policy=None):
+    """
+    Asyncio variant of _iter_run_items for ApifyClientAsync; waits without holding a thread.
+    Args:
+        client (ApifyClientAsync): Authenticated async Apify client
+        usernames (list): Usernames to scrape in this run
+        page_size (int): Dataset items fetched per request
+        policy (BackoffPolicy): Wait strategy (defaults to run_waiter.default_policy())
+    Yields:
+        dict: Raw dataset items
+    """
+    policy = policy or default_policy()
+    run = await acall_with_retry(
+        lambda: client.actor(ACTOR_NAME).start(run_input={"usernames": list(usernames)}),
+        get_rate_limiter("apify", ACTOR_NAME),
+        acquire=True,
+        retry_on=("quota",),
+    )
+    logger.info(f"Actor run started. Run ID: {run['id']}, Status: {run['status']}, Profiles: {len(usernames)}")
+
+    timer = RunTimer(run["id"], len(usernames))
+    dataset = client.dataset(run["defaultDatasetId"])
+    run_client = client.run(run["id"])
+    deadline = time.monotonic() + policy.deadline
+    delays = policy.delays()
+    offset = 0
+    status = None
+    empty_polls = 0
+    try:
+        while True:
+            with span("apify.dataset_poll", run_id=run["id"], offset=offset) as poll:
+                items = (await dataset.list_items(offset=offset, limit=page_size)).items
+                poll.set(items=len(items))
+            timer.mark_poll(len(items))
+            offset += len(items)
+            for item in items:
+                yield item
+            if len(items) == page_size:
+                continue
+            if status in TERMINAL_RUN_STATUSES:
+                if offset or status != "SUCCEEDED" or empty_polls >= EMPTY_RUN_POLLS:
+                    return
+                empty_polls += 1
+                await asyncio.sleep(min(policy.initial_delay, max(0.0, deadline - time.monotonic())))
+                continue
+            if items:
+                delays = policy.delays()
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                logger.warning(f"Run {run['id']}: deadline of {policy.deadline:.0f}s reached with {offset} items; aborting it.")
+                try:
+                    await run_client.abort()
+                except Exception as e:
+                    logger.warning(f"Failed to abort run {run['id']}: {str(e)}")
+                timer.mark_finished("ABORTED")
+                return
+            delay = min(next(delays), remaining)
+            with span("apify.wait_for_finish", run_id=run["id"]):
+                run_info = await run_client.wait_for_finish(wait_secs=max(1, math.ceil(delay)))
+            status = (run_info or {}).get("status")
+            if status in TERMINAL_RUN_STATUSES:
+                timer.mark_finished(status)
+    finally:
+        record_run(timer)
+
+
+def _scrape_batch(client, batch, results, cancel_event):
+    """
+    Scrape one batch in its own actor run, putting (username, profile dict) pairs on the results
+    queue as they arrive, an error entry for every username the run did not return, then None.
+    Args:
+        client (ApifyClient): Authenticated Apify client
+        batch (list): Usernames for this run
+        results (queue.Queue): Where results are put
+        cancel_event (threading.Event): Aborts the run when set
+    """
+    cache = get_scrape_cache()
+    remaining = set(batch)
+    try:
+        for raw_profile in _iter_run_items(client, batch, policy=batch_policy(len(batch)), cancel_event=cancel_event):
+            username = _raw_profile_username(raw_profile)
+            if username not in remaining and len(batch) == 1:
+                username = batch[0]  # Single-profile runs need no matching
+            if username not in remaining:
+                continue
+            remaining.discard(username)
+            profile_data = map_profile(raw_profile)
+            cache.set(username, profile_data)
+            results.put((username, profile_data))
+    except ScrapeCancelled:
+        pass  # The caller stopped reading
+    except Exception as e:
+        logger.error(f"Failed to scrape batch starting at {batch[0]}: {str(e)}")
+    finally:
+        for username in batch:
+            if username in remaining:
+                results.put((username, {"error": "No profile data returned from scraper."}))
+        results.put(None)
+
+
+def iter_scrape_linkedin_profiles(urls, batch_size=None, force_refresh=False, max_concurrency=None):
+    """
+    Scrape many LinkedIn profiles, packing uncached usernames into size-limited actor runs that
+    run concurrently. Each run's deadline grows with its batch size (see run_waiter.batch_policy).
+    Profiles are yielded as soon as they are available: cache hits first, then each
+    run's results as its dataset fills. Closing the generator early aborts runs still going.
+    Args:
+        urls (list): LinkedIn profile URLs or usernames (duplicates are scraped once)
+        batch_size (int): Maximum usernames per actor run (defaults to SCRAPE_BATCH_SIZE)
+        force_refresh (bool): Ignore cached copies and scrape everything again
+        max_concurrency (int): Actor runs in flight at once (defaults to SCRAPE_BATCH_CONCURRENCY)
+    Yields:
+        tuple: (username, profile dict), where the dict carries "error" if that profile failed
+    """
+    batch_size = batch_size or DEFAULT_BATCH_SIZE
+    usernames = []
+    for url in urls:
+        username = normalize_username(url)
+        if username:
+            usernames.append(username)
+        else:
+            logger.warning(f"Skipping invalid LinkedIn URL: {url!r}")
+    usernames = list(dict.fromkeys(usernames))  # Dedupe, keeping input order
+
+    cache = get_scrape_cache()
+    pending = []
+    for username in usernames:
+        cached = None if force_refresh else cache.get(username)
+        if cached is not None:
+            yield username, cached
+        else:
+            pending.append(username)
+    if not pending:
+        return
+
+    api_token = os.environ.get("APIFY_API_TOKEN", "")
+    if not api_token:
+        for username in pending:
+            yield username, {"error": "Apify API token is required but not found in environment variables."}
+        return
+    client = ApifyClient(api_token)
+
+    batches = [pending[start:start + batch_size] for start in range(0, len(pending), batch_size)]
+    results = queue.Queue()
+    cancel_event = threading.Event()
+    executor = ThreadPoolExecutor(max_workers=min(max_concurrency or BATCH_CONCURRENCY, len(batches)),
+                                  thread_name_prefix="scrape-batch")
+    try:
+        for batch in batches:
+            executor.submit(_scrape_batch, client, batch, results, cancel_event)
+        finished = 0
+        while finished < len(batches):
+            result = results.get()
+            if result is None:
+                finished += 1  # One batch has reported every username
+            else:
+                yield result
+    finally:
+        # Only does anything if the caller stopped early: queued batches are dropped, running ones aborted
+        cancel_event.set()
+        executor.shutdown(wait=False, cancel_futures=True)
+
+
+def scrape_linkedin_profiles(urls, batch_size=None, force_refresh=False, max_concurrency=None):
+    """
+    Scrape many LinkedIn profiles in as few actor runs as possible.
+    Args:
+        urls (list): LinkedIn profile URLs or usernames
+        batch_size (int): Maximum usernames per actor run
+        force_refresh (bool): Ignore cached copies and scrape everything again
+        max_concurrency (int): Actor runs in flight at once
+    Returns:
+        dict: Profile dicts keyed by normalized username
+    """
+    return dict(iter_scrape_linkedin_profiles(urls, batch_size=batch_size, force_refresh=force_refresh,
+                                              max_concurrency=max_concurrency))
+
+
+def scrape_linkedin_profile(url, force_refresh=False, cancel_event=None):
     """
     Scrape LinkedIn profile data using Apify's LinkedIn Profile Batch Scraper actor (No Cookies Required).
+    Results are cached on disk per username, so repeat lookups skip the actor run.
     Args:
         url (str): LinkedIn profile URL
+        force_refresh (bool): Ignore any cached copy and scrape again
+        cancel_event (threading.Event): Set it to abort the actor run (see scrape_jobs.py)
     Returns:
         dict: Profile data including About, Experience, Skills, etc., or error message
     """
     try:
+        # Extract username or identifier from the URL
+        username = normalize_username(url)
+        if not username:
+            return {"error": "Invalid LinkedIn URL provided. Unable to extract username."}
+
+        cache = get_scrape_cache()
+        if not force_refresh:
+            cached = cache.get(username)
+            if cached is not None:
+                logger.debug(f"Scrape cache hit for {username}")
+                return cached
+
         # Initialize Apify client with API token
         api_token = os.environ.get("APIFY_API_TOKEN", "")
         if not api_token:
             return {"error": "Apify API token is required but not found in environment variables."}
         client = ApifyClient(api_token)
 
-        # Extract username or identifier from the URL
-        username = url.split('/')[-1] if url.split('/')[-1] else url.split('/')[-2]
-        if not username:
-            return {"error": "Invalid LinkedIn URL provided. Unable to extract username."}
-
-        # Define input for the LinkedIn Profile Batch Scraper actor
-        run_input = {
-            "usernames": [username]  # List of usernames or URLs, limited to one for single profile scraping
-        }
-
-        # Run the LinkedIn Profile Batch Scraper actor
-        actor_name = "apimaestro/linkedin-profile-batch-scraper-no-cookies-required"
-        print(f"Starting Apify actor run for {actor_name} with URL: {url}")
-        actor = client.actor(actor_name)
-        run = actor.call(run_input=run_input)
-        print(f"Actor run started. Run ID: {run['id']}, Status: {run['status']}")
-
-        # Fetch the scraped data from the run's dataset with retries
-        dataset_id = run["defaultDatasetId"]
-        max_retries = 10
-        retry_delay = 30  # seconds to wait between retries
-        items = []
-        for attempt in range(max_retries):
-            items = client.dataset(dataset_id).list_items().items
-            if items:
-                print(f"Data found on attempt {attempt + 1}/{max_retries}.")
-                break  # Data found, exit retry loop
-            if attempt < max_retries - 1:
-                print(f"Retry {attempt + 1}/{max_retries}: No data yet. Waiting {retry_delay} seconds before retrying...")
-                time.sleep(retry_delay)
-
+        # Run the batch scraper for this single username and take the first item
+        logger.info(f"Starting Apify actor run for {ACTOR_NAME} with URL: {url}")
+        items = list(_iter_run_items(client, [username], cancel_event=cancel_event))
         if not items:
             return {"error": "No data found for the provided LinkedIn URL after multiple attempts."}
 
         # Extract relevant profile data from the first item (since we're scraping one profile)
-        raw_profile = items[0] if isinstance(items, list) and items else items
+        raw_profile = items[0]
         if not raw_profile:
             return {"error": "No profile data returned from scraper."}
 
-        # Map the raw data to the expected structure for the app
-        # Based on the provided JSON output structure from apimaestro/linkedin-profile-batch-scraper-no-cookies-required
-        basic_info = raw_profile.get("basic_info", {})
-        profile_data = {
-            "fullName": basic_info.get("fullname", ""),
-            "headline": basic_info.get("headline", ""),
-            "about": basic_info.get("about", ""),
-            "experience": raw_profile.get("experience", []),
-            "skills": [],  # Skills are nested in experience, will extract below
-            "education": raw_profile.get("education", []),
-            "certifications": []  # Certifications may not be directly available, default to empty list
-        }
-
-        # Extract skills from experience entries if available
-        all_skills = []
-        for exp in profile_data["experience"]:
-            if "skills" in exp:
-                all_skills.extend(exp.get("skills", []))
-        # Deduplicate skills
-        profile_data["skills"] = list(set(all_skills)) if all_skills else []
-
-        print("Processed Profile Data for App:", json.dumps(profile_data, indent=2))
+        profile_data = map_profile(raw_profile)
+        debug_json("Processed Profile Data for App:", profile_data)
+        cache.set(username, profile_data)
+        return profile_data
+
+    except ScrapeCancelled as e:
+        logger.info(str(e))
+        return {"error": "Scrape cancelled."}
+    except Exception as e:
+        error_msg = f"Failed to scrape profile: {str(e)}"
+        logger.error(error_msg)
+        return {"error": error_msg}
+
+
+async def scrape_linkedin_profile_async(url, force_refresh=False):
+    """
+    Asyncio variant of scrape_linkedin_profile; waits on the actor run without blocking a thread.
+    Args:
+        url (str): LinkedIn profile URL
+        force_refresh (bool): Ignore any cached copy and scrape again
+    Returns:
+        dict: Profile data including About, Experience, Skills, etc., or error message
+    """
+    try:
+        username = normalize_username(url)
+        if not username:
+            return {"error": "Invalid LinkedIn URL provided. Unable to extract username."}
+
+        cache = get_scrape_cache()
+        if not force_refresh:
+            cached = cache.get(username)
+            if cached is not None:
+                return cached
+
+        api_token = os.environ.get("APIFY_API_TOKEN", "")
+        if not api_token:
+            return {"error": "Apify API token is required but not found in environment variables."}
+        client = ApifyClientAsync(api_token)
+
+        logger.info(f"Starting Apify actor run for {ACTOR_NAME} with URL: {url}")
+        items = _aiter_run_items(client, [username])
+        try:
+            raw_profile = await items.__anext__()
+        except StopAsyncIteration:
+            raw_profile = None
+        finally:
+            await items.aclose()
+        if not raw_profile:
+            return {"error": "No data found for the provided LinkedIn URL after multiple attempts."}
+
+        profile_data = map_profile(raw_profile)
+        cache.set(username, profile_data)
         return profile_data
 
     except Exception as e:
         error_msg = f"Failed to scrape profile: {str(e)}"
-        print(error_msg)
+        logger.error(error_msg)
         return {"error": error_msg}
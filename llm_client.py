@@ -0,0 +1,92 @@
+from langchain_core.runnables import RunnableLambda
+from langchain_google_genai import ChatGoogleGenerativeAI
+from rate_limiter import call_with_retry, get_rate_limiter, next_retry_delay, retry_delays
+from dotenv import load_dotenv
+import threading
+import time
+
+load_dotenv()
+
+DEFAULT_MODEL = "gemini-2.0-flash"
+DEFAULT_TEMPERATURE = 0.7
+
+# Chat model clients shared by every Streamlit session and tool call, keyed by (model, temperature)
+_lock = threading.Lock()
+_llms = {}
+
+
+def get_llm(model=DEFAULT_MODEL, temperature=DEFAULT_TEMPERATURE):
+    """
+    Return the shared chat model client for a model and temperature, creating it once per process.
+    Every call it makes first takes a slot from the process-wide Gemini limiter for the model.
+    The client's own retries are turned off (max_retries=1 means a single attempt): they would
+    bypass the limiter and never pause it, so rate_limiter's retries are the only retry layer.
+    Args:
+        model (str): Gemini model name
+        temperature (float): Sampling temperature
+    Returns:
+        ChatGoogleGenerativeAI: Cached model client
+    """
+    key = (model, float(temperature))
+    with _lock:
+        if key not in _llms:
+            _llms[key] = ChatGoogleGenerativeAI(
+                model=model, temperature=temperature, rate_limiter=get_rate_limiter("gemini", model), max_retries=1
+            )
+        return _llms[key]
+
+
+def invoke_with_retry(prompt, model=DEFAULT_MODEL, temperature=DEFAULT_TEMPERATURE):
+    """
+    Invoke the shared client, retrying quota (429) and server (5xx) errors with backoff.
+    Args:
+        prompt (str | list): Prompt or messages
+        model (str): Gemini model name
+        temperature (float): Sampling temperature
+    Returns:
+        AIMessage: Model response
+    """
+    return call_with_retry(lambda: get_llm(model, temperature).invoke(prompt), get_rate_limiter("gemini", model))
+
+
+def stream_with_retry(prompt, model=DEFAULT_MODEL, temperature=DEFAULT_TEMPERATURE):
+    """
+    Stream the shared client's reply. Quota (429) and server (5xx) errors are retried with backoff
+    as long as nothing has been yielded yet; a failure mid-stream is raised.
+    Args:
+        prompt (str | list): Prompt or messages
+        model (str): Gemini model name
+        temperature (float): Sampling temperature
+    Yields:
+        AIMessageChunk: Chunks of the reply as they are generated
+    """
+    delays = retry_delays()
+    while True:
+        started = False
+        try:
+            for chunk in get_llm(model, temperature).stream(prompt):
+                started = True
+                yield chunk
+            return
+        except Exception as e:
+            delay = None if started else next_retry_delay(e, get_rate_limiter("gemini", model), delays)
+            if delay is None:
+                raise
+        time.sleep(delay)
+
+
+def get_retrying_llm(model=DEFAULT_MODEL, temperature=DEFAULT_TEMPERATURE):
+    """
+    Returns:
+        Runnable: invoke_with_retry as a runnable, for batch / batch_as_completed over many prompts
+    """
+    def invoke(prompt):
+        return invoke_with_retry(prompt, model, temperature)
+
+    return RunnableLambda(invoke, name=f"{model}-with-retry")
+
+
+def clear_llm_cache():
+    """Drop every cached model client (e.g. after changing API keys)."""
+    with _lock:
+        _llms.clear()
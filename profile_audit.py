@@ -0,0 +1,143 @@
+"""
+Bulk offline profile audit: runs the rule-based checks from profile_analyzer over a JSONL file
+of profiles across all CPU cores and streams the results back out as JSONL. No LLM calls.
+
+Usage:
+    python profile_audit.py profiles.jsonl -o audit.jsonl [--processes N] [--chunksize N]
+    cat profiles.jsonl | python profile_audit.py - > audit.jsonl
+"""
+from multiprocessing import Pool
+from profile_analyzer import analyze_profile, suggest_improvements
+import argparse
+import json
+import os
+import sys
+import time
+
+
+def audit_profile(profile_data):
+    """
+    Run every rule-based check on one profile.
+    Args:
+        profile_data (dict): Profile data in the scraper's format
+    Returns:
+        dict: Identifier plus analysis, gaps and suggestions
+    """
+    analysis, gaps = analyze_profile(profile_data)
+    return {
+        "id": profile_data.get("username") or profile_data.get("id") or profile_data.get("fullName", ""),
+        "analysis": analysis,
+        "gaps": gaps,
+        "suggestions": suggest_improvements(profile_data),
+    }
+
+
+def audit_profiles(profiles, processes=None, chunksize=256):
+    """
+    Audit an iterable of profile dicts, in input order, using a process pool.
+    Args:
+        profiles (iterable): Profile dicts
+        processes (int): Worker processes (defaults to the CPU count; 1 runs inline)
+        chunksize (int): Profiles handed to a worker at a time
+    Yields:
+        dict: Result of audit_profile for each profile
+    """
+    processes = processes or os.cpu_count() or 1
+    if processes == 1:
+        yield from map(audit_profile, profiles)
+        return
+    with Pool(processes) as pool:
+        yield from pool.imap(audit_profile, profiles, chunksize=chunksize)
+
+
+def _audit_line(numbered_line):
+    """
+    Worker entry point: parse, audit and serialize one JSONL line, so the parent only does I/O.
+    Returns (ok, line), with ok False and an {"line", "error"} object for an unreadable line.
+    """
+    line_number, line = numbered_line
+    try:
+        profile_data = json.loads(line)
+        if not isinstance(profile_data, dict):
+            raise ValueError("expected a JSON object")
+        return True, json.dumps(audit_profile(profile_data), ensure_ascii=False)
+    except Exception as e:
+        return False, json.dumps({"line": line_number, "error": str(e)}, ensure_ascii=False)
+
+
+def _numbered_lines(lines):
+    for line_number, line in enumerate(lines, start=1):
+        if line.strip():
+            yield line_number, line
+
+
+def audit_lines(lines, processes=None, chunksize=256):
+    """
+    Audit a stream of JSONL lines, in input order, using a process pool.
+    Args:
+        lines (iterable): JSONL lines, one profile object per line (blank lines are skipped)
+        processes (int): Worker processes (defaults to the CPU count; 1 runs inline)
+        chunksize (int): Lines handed to a worker at a time
+    Yields:
+        tuple: (ok, line) per input line: True and the JSON audit result for a profile, or False
+               and an {"line", "error"} JSON object for an unreadable line
+    """
+    processes = processes or os.cpu_count() or 1
+    if processes == 1:
+        yield from map(_audit_line, _numbered_lines(lines))
+        return
+    with Pool(processes) as pool:
+        yield from pool.imap(_audit_line, _numbered_lines(lines), chunksize=chunksize)
+
+
+def audit_file(input_path, output_path, processes=None, chunksize=256):
+    """
+    Audit a JSONL file of profiles and write a JSONL file of results.
+    Args:
+        input_path (str): Input JSONL path, or "-" for stdin
+        output_path (str): Output JSONL path, or "-" for stdout
+        processes (int): Worker processes (defaults to the CPU count)
+        chunksize (int): Lines handed to a worker at a time
+    Returns:
+        dict: Profiles audited, unreadable lines (errors), elapsed seconds and profiles per second
+    """
+    source = sys.stdin if input_path == "-" else open(input_path, encoding="utf-8")
+    sink = sys.stdout if output_path == "-" else open(output_path, "w", encoding="utf-8")
+    count = errors = 0
+    start = time.perf_counter()
+    try:
+        for ok, result in audit_lines(source, processes=processes, chunksize=chunksize):
+            sink.write(result + "\n")
+            if ok:
+                count += 1
+            else:
+                errors += 1
+    finally:
+        if source is not sys.stdin:
+            source.close()
+        if sink is not sys.stdout:
+            sink.close()
+    elapsed = time.perf_counter() - start
+    return {
+        "profiles": count,
+        "errors": errors,
+        "seconds": elapsed,
+        "profiles_per_second": count / elapsed if elapsed else 0.0,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Audit LinkedIn profiles from a JSONL file without any LLM calls.")
+    parser.add_argument("input", help="JSONL file with one profile per line, or - for stdin")
+    parser.add_argument("-o", "--output", default="-", help="JSONL file for the results (default: stdout)")
+    parser.add_argument("-p", "--processes", type=int, default=None, help="Worker processes (default: CPU count)")
+    parser.add_argument("--chunksize", type=int, default=256, help="Profiles handed to a worker at a time")
+    args = parser.parse_args(argv)
+
+    stats = audit_file(args.input, args.output, processes=args.processes, chunksize=args.chunksize)
+    print(f"Audited {stats['profiles']} profiles ({stats['errors']} unreadable lines) in {stats['seconds']:.2f}s "
+          f"- {stats['profiles_per_second']:.0f} profiles/s", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
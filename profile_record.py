@@ -0,0 +1,206 @@
+from dataclasses import dataclass
+import sys
+
+
+def _text(value):
+    return value.strip() if isinstance(value, str) else ""
+
+
+def _date(value):
+    """Format a scraper date ({"year": 2021, "month": "Mar"} or a string) as "Mar 2021"."""
+    if isinstance(value, dict):
+        return " ".join(str(value[key]) for key in ("month", "year") if value.get(key))
+    return _text(value)
+
+
+def _date_range(entry):
+    if _text(entry.get("date_range")):
+        return _text(entry["date_range"])
+    start = _date(entry.get("start_date"))
+    end = _date(entry.get("end_date")) or ("Present" if entry.get("is_current") or start else "")
+    return f"{start} - {end}" if start else end
+
+
+def _dedupe_skills(skills):
+    """Order-preserving dedup of skill names; repeated names share one interned string."""
+    seen = {}
+    for skill in skills:
+        name = _text(skill.get("name") if isinstance(skill, dict) else skill)
+        if name and name.lower() not in seen:
+            seen[name.lower()] = sys.intern(name)
+    return tuple(seen.values())
+
+
+@dataclass(frozen=True)
+class ExperienceEntry:
+    __slots__ = ("title", "company", "location", "date_range", "description", "skills")
+    title: str
+    company: str
+    location: str
+    date_range: str
+    description: str
+    skills: tuple
+
+    @classmethod
+    def from_apify(cls, entry):
+        """
+        Args:
+            entry (dict): Experience item from the actor dataset, or from to_dict()
+        Returns:
+            ExperienceEntry: Compact entry
+        """
+        return cls(
+            title=_text(entry.get("title")),
+            company=sys.intern(_text(entry.get("company"))),
+            location=_text(entry.get("location")),
+            date_range=_date_range(entry),
+            description=_text(entry.get("description")),
+            skills=_dedupe_skills(entry.get("skills") or []),
+        )
+
+    def to_dict(self):
+        return {
+            "title": self.title,
+            "company": self.company,
+            "location": self.location,
+            "date_range": self.date_range,
+            "description": self.description,
+            "skills": list(self.skills),
+        }
+
+
+@dataclass(frozen=True)
+class EducationEntry:
+    __slots__ = ("school", "degree", "field_of_study", "date_range")
+    school: str
+    degree: str
+    field_of_study: str
+    date_range: str
+
+    @classmethod
+    def from_apify(cls, entry):
+        """
+        Args:
+            entry (dict): Education item from the actor dataset, or from to_dict()
+        Returns:
+            EducationEntry: Compact entry
+        """
+        return cls(
+            school=sys.intern(_text(entry.get("school"))),
+            degree=_text(entry.get("degree") or entry.get("degree_name")),
+            field_of_study=_text(entry.get("field_of_study")),
+            date_range=_date_range(entry),
+        )
+
+    def to_dict(self):
+        return {
+            "school": self.school,
+            "degree": self.degree,
+            "field_of_study": self.field_of_study,
+            "date_range": self.date_range,
+        }
+
+
+@dataclass
+class ProfileRecord:
+    """
+    Compact profile kept in session state: only the fields the app uses, slotted entries and
+    interned skill strings. Supports profile_data.get("fullName") style access so existing
+    code written against the scraper's dict keeps working.
+    """
+    __slots__ = ("username", "full_name", "headline", "about", "experience", "skills", "education", "certifications")
+    username: str
+    full_name: str
+    headline: str
+    about: str
+    experience: tuple
+    skills: tuple
+    education: tuple
+    certifications: tuple
+
+    # Scraper dict keys -> attribute names
+    _KEYS = {
+        "username": "username",
+        "fullName": "full_name",
+        "headline": "headline",
+        "about": "about",
+        "experience": "experience",
+        "skills": "skills",
+        "education": "education",
+        "certifications": "certifications",
+    }
+
+    @classmethod
+    def from_apify(cls, raw_profile):
+        """
+        Build a record straight from one actor dataset item.
+        Args:
+            raw_profile (dict): Item from the apimaestro/linkedin-profile-batch-scraper-no-cookies-required dataset
+        Returns:
+            ProfileRecord: Compact profile
+        """
+        basic_info = raw_profile.get("basic_info") or {}
+        experience = tuple(ExperienceEntry.from_apify(exp) for exp in raw_profile.get("experience") or [] if isinstance(exp, dict))
+        return cls(
+            username=_text(basic_info.get("public_identifier")).lower(),
+            full_name=_text(basic_info.get("fullname")),
+            headline=_text(basic_info.get("headline")),
+            about=_text(basic_info.get("about")),
+            experience=experience,
+            # Skills are nested in experience entries
+            skills=_dedupe_skills(skill for exp in experience for skill in exp.skills),
+            education=tuple(EducationEntry.from_apify(edu) for edu in raw_profile.get("education") or [] if isinstance(edu, dict)),
+            certifications=tuple(sys.intern(_text(c.get("name") if isinstance(c, dict) else c))
+                                 for c in raw_profile.get("certifications") or []),
+        )
+
+    @classmethod
+    def from_dict(cls, profile_data):
+        """
+        Build a record from the scraper's profile dict (as returned by scrape_linkedin_profile).
+        Args:
+            profile_data (dict): Profile data with fullName, headline, about, experience, skills, education, certifications
+        Returns:
+            ProfileRecord: Compact profile
+        """
+        return cls(
+            username=_text(profile_data.get("username")),
+            full_name=_text(profile_data.get("fullName")),
+            headline=_text(profile_data.get("headline")),
+            about=_text(profile_data.get("about")),
+            experience=tuple(ExperienceEntry.from_apify(exp) for exp in profile_data.get("experience") or [] if isinstance(exp, dict)),
+            skills=_dedupe_skills(profile_data.get("skills") or []),
+            education=tuple(EducationEntry.from_apify(edu) for edu in profile_data.get("education") or [] if isinstance(edu, dict)),
+            certifications=tuple(sys.intern(_text(c.get("name") if isinstance(c, dict) else c))
+                                 for c in profile_data.get("certifications") or []),
+        )
+
+    def to_dict(self):
+        """
+        Returns:
+            dict: Profile in the scraper's dict format, with compact experience and education entries
+        """
+        return {
+            "username": self.username,
+            "fullName": self.full_name,
+            "headline": self.headline,
+            "about": self.about,
+            "experience": [exp.to_dict() for exp in self.experience],
+            "skills": list(self.skills),
+            "education": [edu.to_dict() for edu in self.education],
+            "certifications": list(self.certifications),
+        }
+
+    def get(self, key, default=None):
+        """Dict-style access by scraper key (e.g. "fullName"); experience/education return entry objects."""
+        attribute = self._KEYS.get(key)
+        return getattr(self, attribute) if attribute else default
+
+    def __contains__(self, key):
+        # A record is never an error result, so `"error" in profile_data` checks stay valid
+        return key in self._KEYS
+
+    def __getitem__(self, key):
+        if key not in self._KEYS:
+            raise KeyError(key)
+        return getattr(self, self._KEYS[key])
@@ -0,0 +1,373 @@
+"""
+Process-wide request scheduling for the Gemini and Apify quotas. Every (provider, model) pair
+gets one token bucket shared by all Streamlit sessions; callers that have to wait queue by
+priority, so interactive chat goes ahead of bulk rewrites. Quota (429) and server (5xx) errors
+are retried with jittered backoff, and a quota error pauses the shared bucket so concurrent
+sessions back off together instead of all failing at once. Queue waits are recorded as
+"ratelimit.wait.<provider>" spans.
+"""
+from contextlib import contextmanager
+from contextvars import ContextVar
+from langchain_core.rate_limiters import BaseRateLimiter
+from run_waiter import BackoffPolicy
+from telemetry import logger, record_span, telemetry
+import asyncio
+import heapq
+import itertools
+import os
+import re
+import threading
+import time
+
+# Lower runs first
+PRIORITY_INTERACTIVE = 0  # Chat turns a user is waiting on
+PRIORITY_DEFAULT = 5  # Profile analysis and scrapes
+PRIORITY_BULK = 10  # Rewrite packs and other batch work
+
+_priority = ContextVar("request_priority", default=PRIORITY_DEFAULT)
+
+# Error kinds retried by default (see error_kind())
+RETRY_ON = ("quota", "server")
+
+_QUOTA_TEXT = ("429", "resource has been exhausted", "resource_exhausted", "rate limit", "quota")
+_SERVER_ERROR_RE = re.compile(r"\b(500|502|503|504)\b|unavailable|overloaded", re.IGNORECASE)
+
+
+@contextmanager
+def request_priority(priority):
+    """
+    Run a block of model or actor calls at a priority. Propagates into LangChain's worker
+    threads (batch calls, agent nodes), which copy the caller's context. Generators that hold
+    it across yields must be decorated with telemetry.context_isolated, so the priority does
+    not leak into their caller between yields.
+    Args:
+        priority (int): PRIORITY_INTERACTIVE, PRIORITY_DEFAULT or PRIORITY_BULK
+    """
+    token = _priority.set(priority)
+    try:
+        yield
+    finally:
+        _priority.reset(token)
+
+
+class TokenBucket:
+    """Refills at rate tokens per second up to capacity."""
+
+    def __init__(self, rate, capacity):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+        self.paused_until = 0.0
+
+    def _refill(self, now):
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def try_take(self, now):
+        if now < self.paused_until:
+            return False
+        self._refill(now)
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return True
+        return False
+
+    def wait_time(self, now):
+        """Seconds until a token can be taken."""
+        if now < self.paused_until:
+            return self.paused_until - now
+        self._refill(now)
+        return max(0.0, (1 - self.tokens) / self.rate)
+
+    def pause(self, seconds, now):
+        """Hand out nothing for a while and start again from an empty bucket."""
+        self.paused_until = max(self.paused_until, now + seconds)
+        self.tokens = 0.0
+        self.updated = self.paused_until
+
+
+class PriorityRateLimiter(BaseRateLimiter):
+    """
+    Token-bucket limiter with a priority queue of waiters. Plugs into LangChain chat models
+    through their rate_limiter field, and can be acquired directly for other APIs (e.g. actor starts).
+    """
+
+    def __init__(self, provider, model, requests_per_minute, burst=None):
+        """
+        Args:
+            provider (str): "gemini" or "apify"
+            model (str): Model or actor name; each gets its own bucket
+            requests_per_minute (float): Sustained request rate
+            burst (int): Requests allowed back to back (defaults to a sixth of a minute's worth, at least 1)
+        """
+        self.provider = provider
+        self.model = model
+        self.requests_per_minute = requests_per_minute
+        self._bucket = TokenBucket(requests_per_minute / 60.0, burst or max(1, int(requests_per_minute // 6)))
+        self._cond = threading.Condition()
+        self._waiting = []
+        self._sequence = itertools.count()
+        self._wakers = {}  # Ticket -> callback waking a queued coroutine on its event loop
+
+    def acquire(self, *, blocking=True):
+        """
+        Take one request slot, waiting behind higher-priority callers if needed.
+        Args:
+            blocking (bool): Wait for a slot instead of returning False at once
+        Returns:
+            bool: True once a slot was taken
+        """
+        priority = _priority.get()
+        start = time.monotonic()
+        with self._cond:
+            if not blocking:
+                return not self._waiting and self._bucket.try_take(start)
+            ticket = (priority, next(self._sequence))
+            heapq.heappush(self._waiting, ticket)
+            try:
+                while True:
+                    now = time.monotonic()
+                    if self._waiting[0] == ticket and self._bucket.try_take(now):
+                        heapq.heappop(self._waiting)
+                        self._wake_all()
+                        break
+                    # Only the head of the queue watches the clock; the rest wait for it to leave
+                    self._cond.wait(self._bucket.wait_time(now) if self._waiting[0] == ticket else None)
+            except BaseException:
+                # Interrupted while queued (e.g. KeyboardInterrupt): give up the place in line so the
+                # callers behind this ticket are not stuck waiting for it
+                if ticket in self._waiting:
+                    self._waiting.remove(ticket)
+                    heapq.heapify(self._waiting)
+                    self._wake_all()
+                raise
+        self._record_wait(priority, start)
+        return True
+
+    async def aacquire(self, *, blocking=True):
+        """
+        Asyncio variant of acquire. Queued coroutines share the priority order with threads but
+        wait on an asyncio.Event, so they do not hold a thread.
+        Args:
+            blocking (bool): Wait for a slot instead of returning False at once
+        Returns:
+            bool: True once a slot was taken
+        """
+        if not blocking:
+            return self.acquire(blocking=False)
+        priority = _priority.get()
+        start = time.monotonic()
+        loop = asyncio.get_running_loop()
+        wakeup = asyncio.Event()
+        with self._cond:
+            ticket = (priority, next(self._sequence))
+            heapq.heappush(self._waiting, ticket)
+            self._wakers[ticket] = lambda: loop.call_soon_threadsafe(wakeup.set)
+        try:
+            while True:
+                with self._cond:
+                    now = time.monotonic()
+                    if self._waiting[0] == ticket and self._bucket.try_take(now):
+                        heapq.heappop(self._waiting)
+                        del self._wakers[ticket]
+                        self._wake_all()
+                        break
+                    timeout = self._bucket.wait_time(now) if self._waiting[0] == ticket else None
+                    wakeup.clear()  # Wakeups from here on are scheduled on the loop, so none are lost
+                try:
+                    await asyncio.wait_for(wakeup.wait(), timeout)
+                except asyncio.TimeoutError:
+                    pass
+        except BaseException:
+            # Cancelled while queued: give up the place in line
+            with self._cond:
+                if self._wakers.pop(ticket, None) is not None:
+                    self._waiting.remove(ticket)
+                    heapq.heapify(self._waiting)
+                    self._wake_all()
+            raise
+        self._record_wait(priority, start)
+        return True
+
+    def _wake_all(self):
+        """Let every queued waiter re-check whether it is at the head. Caller holds the lock."""
+        self._cond.notify_all()
+        for waker in self._wakers.values():
+            waker()
+
+    def _record_wait(self, priority, start):
+        wait = time.monotonic() - start
+        record_span(f"ratelimit.wait.{self.provider}", wait, model=self.model, priority=priority)
+        if wait > 0.001:
+            telemetry.increment(f"ratelimit.throttled.{self.provider}")
+
+    def pause(self, seconds):
+        """Stop handing out slots for a while, e.g. after the provider reported a quota error."""
+        with self._cond:
+            self._bucket.pause(seconds, time.monotonic())
+            self._wake_all()
+
+    def queue_length(self):
+        with self._cond:
+            return len(self._waiting)
+
+
+_limiters = {}
+_limiters_lock = threading.Lock()
+
+
+def get_rate_limiter(provider, model):
+    """
+    Return the process-wide limiter for a provider and model, creating it on first use.
+    Rates come from GEMINI_RPM / GEMINI_BURST and APIFY_RPM / APIFY_BURST (requests per minute,
+    applied to each model or actor separately).
+    Args:
+        provider (str): "gemini" or "apify"
+        model (str): Model or actor name
+    Returns:
+        PriorityRateLimiter: Shared limiter
+    """
+    key = (provider, model)
+    with _limiters_lock:
+        if key not in _limiters:
+            prefix = provider.upper()
+            default_rpm = {"gemini": 60, "apify": 30}.get(provider, 60)
+            burst = os.environ.get(f"{prefix}_BURST")
+            _limiters[key] = PriorityRateLimiter(
+                provider,
+                model,
+                requests_per_minute=float(os.environ.get(f"{prefix}_RPM", default_rpm)),
+                burst=int(burst) if burst else None,
+            )
+        return _limiters[key]
+
+
+def error_kind(error):
+    """
+    Args:
+        error (Exception): Error raised by a Gemini or Apify call
+    Returns:
+        str: "quota" for 429s, "server" for transient 5xx errors, None for anything not worth retrying
+    """
+    for attribute in ("status_code", "code", "status"):
+        status = getattr(error, attribute, None)
+        if isinstance(status, int):
+            return "quota" if status == 429 else "server" if 500 <= status < 600 else None
+    message = str(error)
+    if any(text in message.lower() for text in _QUOTA_TEXT):
+        return "quota"
+    return "server" if _SERVER_ERROR_RE.search(message) else None
+
+
+def is_retryable(error):
+    """
+    Args:
+        error (Exception): Error raised by a Gemini or Apify call
+    Returns:
+        bool: True for quota (429) and transient server (5xx) errors
+    """
+    return error_kind(error) is not None
+
+
+def retry_policy():
+    """
+    Returns:
+        BackoffPolicy: Policy configured from RATE_LIMIT_RETRY_INITIAL, RATE_LIMIT_RETRY_MAX and RATE_LIMIT_RETRY_DEADLINE (seconds)
+    """
+    return BackoffPolicy(
+        initial_delay=float(os.environ.get("RATE_LIMIT_RETRY_INITIAL", 1.0)),
+        max_delay=float(os.environ.get("RATE_LIMIT_RETRY_MAX", 20.0)),
+        jitter=0.5,
+        deadline=float(os.environ.get("RATE_LIMIT_RETRY_DEADLINE", 60.0)),
+    )
+
+
+def retry_delays(policy=None):
+    """
+    Args:
+        policy (BackoffPolicy): Backoff between attempts (defaults to retry_policy())
+    Yields:
+        float: Waits between attempts, ending before the policy's deadline would be exceeded
+    """
+    policy = policy or retry_policy()
+    deadline = time.monotonic() + policy.deadline
+    for delay in policy.delays():
+        if time.monotonic() + delay > deadline:
+            return
+        yield delay
+
+
+def next_retry_delay(error, limiter, delays, retry_on=RETRY_ON):
+    """
+    Decide whether a failed request is retried. A quota error also pauses the shared limiter,
+    so every session using that quota backs off, not just this caller.
+    Args:
+        error (Exception): The error the request raised
+        limiter (PriorityRateLimiter): Limiter for the provider and model being called
+        delays (iterator): From retry_delays()
+        retry_on (tuple): Error kinds (see error_kind()) worth retrying
+    Returns:
+        float: Seconds to wait before retrying, or None to give up
+    """
+    kind = error_kind(error)
+    delay = next(delays, None) if kind in retry_on else None
+    if delay is None:
+        return None
+    telemetry.increment(f"ratelimit.retries.{limiter.provider}")
+    logger.warning(f"{limiter.provider} {limiter.model}: {kind} error ({type(error).__name__}), retrying in {delay:.1f}s")
+    if kind == "quota":
+        limiter.pause(delay)
+    return delay
+
+
+def call_with_retry(fn, limiter, acquire=False, policy=None, retry_on=RETRY_ON):
+    """
+    Call fn(), retrying quota and server errors with jittered backoff until the policy's deadline.
+    Args:
+        fn (callable): The request
+        limiter (PriorityRateLimiter): Limiter for the provider and model being called
+        acquire (bool): Take a slot from the limiter before each attempt (for clients that do not
+                        do it themselves, unlike chat models built by llm_client.get_llm)
+        policy (BackoffPolicy): Backoff between attempts (defaults to retry_policy())
+        retry_on (tuple): Error kinds to retry; pass ("quota",) for requests that are not
+                          idempotent, where a server error may come after the work was done
+    Returns:
+        The result of fn()
+    """
+    delays = retry_delays(policy)
+    while True:
+        if acquire:
+            limiter.acquire()
+        try:
+            return fn()
+        except Exception as e:
+            delay = next_retry_delay(e, limiter, delays, retry_on)
+            if delay is None:
+                raise
+        time.sleep(delay)
+
+
+async def acall_with_retry(fn, limiter, acquire=False, policy=None, retry_on=RETRY_ON):
+    """
+    Asyncio variant of call_with_retry.
+    Args:
+        fn (callable): Returns an awaitable for the request
+        limiter (PriorityRateLimiter): Limiter for the provider and model being called
+        acquire (bool): Take a slot from the limiter before each attempt
+        policy (BackoffPolicy): Backoff between attempts (defaults to retry_policy())
+        retry_on (tuple): Error kinds to retry
+    Returns:
+        The result of the awaited request
+    """
+    delays = retry_delays(policy)
+    while True:
+        if acquire:
+            await limiter.aacquire()
+        try:
+            return await fn()
+        except Exception as e:
+            delay = next_retry_delay(e, limiter, delays, retry_on)
+            if delay is None:
+                raise
+        await asyncio.sleep(delay)
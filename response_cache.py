@@ -0,0 +1,142 @@
+from collections import OrderedDict
+from cache_store import SQLiteCache
+import hashlib
+import json
+import os
+import re
+import threading
+import time
+
+
+def normalize_text(text):
+    """Collapse whitespace so formatting-only differences map to the same cache entry."""
+    return re.sub(r"\s+", " ", str(text or "")).strip()
+
+
+def make_key(*parts):
+    """
+    Build a stable cache key from the inputs that determine an LLM response.
+    Args:
+        *parts: JSON-serializable key parts (e.g. text hash, job role, model, temperature, prompt version)
+    Returns:
+        str: Hex digest
+    """
+    return hashlib.sha256(json.dumps(parts, separators=(",", ":")).encode("utf-8")).hexdigest()
+
+
+class ResponseCache:
+    """
+    Two-tier cache for LLM responses: an in-memory LRU in front of an optional SQLiteCache on disk.
+    Both tiers honour the same TTL; disk hits are promoted into memory.
+    """
+
+    def __init__(self, max_entries=512, ttl_seconds=7 * 24 * 60 * 60, disk_cache=None):
+        """
+        Args:
+            max_entries (int): Maximum in-memory entries before evicting the least recently used
+            ttl_seconds (float): Entry lifetime in seconds; 0 or None disables expiry
+            disk_cache (SQLiteCache): Optional persistent tier
+        """
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.disk_cache = disk_cache
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        """
+        Args:
+            key (str): Key from make_key()
+        Returns:
+            The cached response, or None on a miss
+        """
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                created_at, value = entry
+                if not self.ttl_seconds or now - created_at <= self.ttl_seconds:
+                    self._entries.move_to_end(key)
+                    self.memory_hits += 1
+                    return value
+                del self._entries[key]
+        entry = self.disk_cache.get_entry(key) if self.disk_cache is not None else None
+        with self._lock:
+            if entry is None:
+                self.misses += 1
+                return None
+            value, created_at = entry
+            self.disk_hits += 1
+            # Keep the disk entry's age so promotion does not restart its TTL
+            self._put(key, value, created_at)
+        return value
+
+    def _put(self, key, value, created_at):
+        self._entries[key] = (created_at, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def set(self, key, value):
+        """
+        Args:
+            key (str): Key from make_key()
+            value: JSON-serializable response
+        """
+        with self._lock:
+            self._put(key, value, time.time())
+        if self.disk_cache is not None:
+            self.disk_cache.set(key, value)
+
+    def clear(self):
+        """Remove every entry from both tiers and reset the counters."""
+        with self._lock:
+            self._entries.clear()
+            self.memory_hits = self.disk_hits = self.misses = self.evictions = 0
+        if self.disk_cache is not None:
+            self.disk_cache.clear()
+
+    def stats(self):
+        """
+        Returns:
+            dict: Hit/miss/eviction counters, hit rate and in-memory size
+        """
+        hits = self.memory_hits + self.disk_hits
+        lookups = hits + self.misses
+        return {
+            "memory_hits": self.memory_hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": hits / lookups if lookups else 0.0,
+            "size": len(self._entries),
+        }
+
+
+_response_cache = None
+_response_cache_lock = threading.Lock()
+
+
+def get_response_cache():
+    """
+    Return the process-wide response cache, creating it on first use.
+    Configured via RESPONSE_CACHE_MAX_ENTRIES, RESPONSE_CACHE_TTL (seconds) and RESPONSE_CACHE_PATH
+    (disk persistence is enabled only when a path is set).
+    Returns:
+        ResponseCache: Shared cache instance
+    """
+    global _response_cache
+    with _response_cache_lock:
+        if _response_cache is None:
+            max_entries = int(os.environ.get("RESPONSE_CACHE_MAX_ENTRIES", 512))
+            ttl_seconds = float(os.environ.get("RESPONSE_CACHE_TTL", 7 * 24 * 60 * 60))
+            path = os.environ.get("RESPONSE_CACHE_PATH", "")
+            disk_cache = SQLiteCache(path, ttl_seconds=ttl_seconds, max_entries=max_entries * 8,
+                                     table="responses") if path else None
+            _response_cache = ResponseCache(max_entries=max_entries, ttl_seconds=ttl_seconds, disk_cache=disk_cache)
+        return _response_cache
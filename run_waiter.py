@@ -0,0 +1,144 @@
+import os
+import random
+import threading
+import time
+from collections import deque
+from telemetry import logger, record_span
+
+
+class BackoffPolicy:
+    """
+    Exponential backoff with jitter and an overall deadline, used when waiting on actor runs.
+    """
+
+    def __init__(self, initial_delay=1.0, factor=2.0, max_delay=30.0, jitter=0.25, deadline=300.0):
+        """
+        Args:
+            initial_delay (float): First wait in seconds
+            factor (float): Multiplier applied after every wait
+            max_delay (float): Upper bound for a single wait in seconds
+            jitter (float): Fraction (0-1) of each wait that is randomized, to spread out concurrent pollers
+            deadline (float): Total seconds allowed before giving up
+        """
+        self.initial_delay = initial_delay
+        self.factor = factor
+        self.max_delay = max_delay
+        self.jitter = jitter
+        self.deadline = deadline
+
+    def delays(self):
+        """
+        Yields:
+            float: Successive jittered wait times in seconds (never ends; callers enforce the deadline)
+        """
+        delay = self.initial_delay
+        while True:
+            yield delay * (1 - self.jitter * random.random())
+            delay = min(delay * self.factor, self.max_delay)
+
+
+def default_policy():
+    """
+    Returns:
+        BackoffPolicy: Policy configured from SCRAPE_POLL_INITIAL, SCRAPE_POLL_MAX and SCRAPE_DEADLINE (seconds)
+    """
+    return BackoffPolicy(
+        initial_delay=float(os.environ.get("SCRAPE_POLL_INITIAL", 1.0)),
+        max_delay=float(os.environ.get("SCRAPE_POLL_MAX", 30.0)),
+        deadline=float(os.environ.get("SCRAPE_DEADLINE", 300.0)),
+    )
+
+
+def batch_policy(profiles):
+    """
+    Args:
+        profiles (int): Usernames packed into the actor run
+    Returns:
+        BackoffPolicy: default_policy() with the deadline extended by SCRAPE_DEADLINE_PER_PROFILE
+                       seconds for every profile after the first, so large runs are not cut off
+    """
+    policy = default_policy()
+    policy.deadline += max(0, profiles - 1) * float(os.environ.get("SCRAPE_DEADLINE_PER_PROFILE", 30.0))
+    return policy
+
+
+class RunTimer:
+    """
+    Timing of one actor run: when it started, when the first dataset item showed up and when it finished.
+    """
+
+    def __init__(self, run_id, profiles=1):
+        self.run_id = run_id
+        self.profiles = profiles
+        self.started_at = time.monotonic()
+        self.first_data_at = None
+        self.finished_at = None
+        self.status = None
+        self.polls = 0
+        self.items = 0
+
+    def mark_poll(self, items=0):
+        """Record one dataset poll and how many items it returned."""
+        self.polls += 1
+        self.items += items
+        if items and self.first_data_at is None:
+            self.first_data_at = time.monotonic()
+
+    def mark_finished(self, status):
+        """Record the run reaching a terminal status."""
+        self.finished_at = time.monotonic()
+        self.status = status
+
+    @property
+    def time_to_data(self):
+        """Seconds from run start to the first dataset item, or None if no data arrived."""
+        return None if self.first_data_at is None else self.first_data_at - self.started_at
+
+    def as_dict(self):
+        return {
+            "run_id": self.run_id,
+            "profiles": self.profiles,
+            "status": self.status,
+            "polls": self.polls,
+            "items": self.items,
+            "time_to_data": self.time_to_data,
+            "run_duration": None if self.finished_at is None else self.finished_at - self.started_at,
+        }
+
+
+# Most recent run timings, kept for inspection from the app or a shell
+_recent_runs = deque(maxlen=200)
+_recent_runs_lock = threading.Lock()
+
+
+def record_run(timer):
+    """
+    Store a finished run's timing, log it and record it as an "apify.actor_run" span.
+    Args:
+        timer (RunTimer): Timing for the run
+    """
+    stats = timer.as_dict()
+    with _recent_runs_lock:
+        _recent_runs.append(stats)
+    ttd = stats["time_to_data"]
+    logger.info(f"Run {timer.run_id}: time to data {'n/a' if ttd is None else f'{ttd:.2f}s'}, "
+                f"{stats['items']} items in {stats['polls']} polls, status {stats['status']}")
+    record_span(
+        "apify.actor_run",
+        time.monotonic() - timer.started_at,
+        status="ok" if stats["status"] in (None, "SUCCEEDED") else stats["status"].lower(),
+        run_id=timer.run_id,
+        profiles=timer.profiles,
+        polls=stats["polls"],
+        items=stats["items"],
+        time_to_data=ttd,
+    )
+
+
+def recent_run_timings():
+    """
+    Returns:
+        list: Timing dicts for the most recent actor runs, oldest first
+    """
+    with _recent_runs_lock:
+        return list(_recent_runs)
@@ -0,0 +1,243 @@
+"""
+Background scrape jobs. Profiles are scraped on a bounded worker pool so the Streamlit script
+thread never blocks on an actor run; the UI submits a job, polls its status and may cancel it.
+Concurrent requests for the same username are coalesced onto one in-flight scrape (single-flight),
+so two users submitting the same profile share one actor run.
+"""
+from concurrent.futures import ThreadPoolExecutor
+import os
+import threading
+import time
+import uuid
+import linkedin_scraper
+from telemetry import logger, span, telemetry
+
+QUEUED = "queued"
+RUNNING = "running"
+SUCCEEDED = "succeeded"
+FAILED = "failed"
+CANCELLED = "cancelled"
+FINISHED_STATUSES = {SUCCEEDED, FAILED, CANCELLED}
+
+
+class _Flight:
+    """One scrape of one username, shared by every job that asked for it while it was in flight."""
+
+    __slots__ = ("username", "url", "force_refresh", "cancel_event", "job_ids", "status", "result",
+                 "future", "created_at", "started_at", "finished_at")
+
+    def __init__(self, username, url, force_refresh):
+        self.username = username
+        self.url = url
+        self.force_refresh = force_refresh
+        self.cancel_event = threading.Event()
+        self.job_ids = set()
+        self.status = QUEUED
+        self.result = None
+        self.future = None
+        self.created_at = time.time()
+        self.started_at = None
+        self.finished_at = None
+
+    def finish(self, status, result):
+        self.status = status
+        self.result = result
+        self.finished_at = time.time()
+
+
+class ScrapeJob:
+    """A caller's handle on a (possibly shared) scrape."""
+
+    __slots__ = ("id", "flight", "cancelled", "submitted_at")
+
+    def __init__(self, flight, submitted_at=None):
+        self.id = uuid.uuid4().hex
+        self.flight = flight
+        self.cancelled = False
+        self.submitted_at = submitted_at or time.time()
+
+
+class ScrapeJobManager:
+    """
+    Runs scrape_linkedin_profile on a bounded thread pool with job ids, status polling,
+    cancellation and per-username single-flight coalescing.
+    """
+
+    def __init__(self, max_workers=4, max_pending=100, retention_seconds=600):
+        """
+        Args:
+            max_workers (int): Scrapes running at once (each one may hold an actor run)
+            max_pending (int): Scrapes waiting for a free worker before new submissions are refused
+            retention_seconds (float): How long finished jobs stay available to status()/result()
+        """
+        self.max_workers = max_workers
+        self.max_pending = max_pending
+        self.retention_seconds = retention_seconds
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="scrape-job")
+        self._lock = threading.Lock()
+        self._jobs = {}
+        self._inflight = {}
+        self._busy_workers = 0
+
+    def submit(self, url, force_refresh=False):
+        """
+        Start scraping a profile in the background, or join the scrape already running for it.
+        Args:
+            url (str): LinkedIn profile URL
+            force_refresh (bool): Ignore any cached copy (ignored when joining an in-flight scrape)
+        Returns:
+            str: Job id for status(), result() and cancel()
+        """
+        username = linkedin_scraper.normalize_username(url)
+        submitted_at = time.time()
+        with self._lock:
+            self._prune()
+            flight = self._inflight.get(username) if username else None
+            if flight is not None:
+                telemetry.increment("scrape_jobs.coalesced")
+                logger.info(f"Scrape for {username} already in flight; joining it")
+            else:
+                flight = _Flight(username, url, force_refresh)
+                if not username:
+                    flight.finish(FAILED, {"error": "Invalid LinkedIn URL provided. Unable to extract username."})
+                elif self._backlog() >= self.max_pending:
+                    telemetry.increment("scrape_jobs.rejected")
+                    flight.finish(FAILED, {"error": "Too many profiles are being scraped right now. Please try again shortly."})
+                else:
+                    self._inflight[username] = flight
+                    flight.future = self._executor.submit(self._run, flight)
+            job = ScrapeJob(flight, submitted_at)
+            flight.job_ids.add(job.id)
+            self._jobs[job.id] = job
+        telemetry.increment("scrape_jobs.submitted")
+        return job.id
+
+    def status(self, job_id):
+        """
+        Args:
+            job_id (str): Id from submit()
+        Returns:
+            dict: id, username, status, shared_with (other jobs on the same scrape) and timings,
+                  or None for an unknown or expired job
+        """
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is None:
+                return None
+            flight = job.flight
+            now = time.time()
+            return {
+                "id": job.id,
+                "username": flight.username,
+                "status": CANCELLED if job.cancelled else flight.status,
+                "shared_with": len(flight.job_ids) - (0 if job.cancelled else 1),
+                "queued_seconds": (flight.started_at or now) - flight.created_at,
+                "elapsed_seconds": (flight.finished_at or now) - job.submitted_at,
+            }
+
+    def result(self, job_id):
+        """
+        Args:
+            job_id (str): Id from submit()
+        Returns:
+            dict: The scraper's profile dict or error dict once the job has finished, else None
+        """
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is None:
+                return None
+            if job.cancelled:
+                return {"error": "Scrape cancelled."}
+            return job.flight.result if job.flight.status in FINISHED_STATUSES else None
+
+    def cancel(self, job_id):
+        """
+        Cancel a job. The underlying scrape is only stopped (dequeued, or its actor run aborted)
+        once every job sharing it has been cancelled.
+        Args:
+            job_id (str): Id from submit()
+        Returns:
+            bool: True if the job was still pending and is now cancelled
+        """
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is None or job.cancelled or job.flight.status in FINISHED_STATUSES:
+                return False
+            job.cancelled = True
+            flight = job.flight
+            flight.job_ids.discard(job_id)
+            if not flight.job_ids:
+                flight.cancel_event.set()
+                # A new request for this username should start a fresh scrape, not join a dying one
+                if self._inflight.get(flight.username) is flight:
+                    del self._inflight[flight.username]
+                if flight.future.cancel():
+                    flight.finish(CANCELLED, {"error": "Scrape cancelled."})
+            telemetry.increment("scrape_jobs.cancelled")
+            return True
+
+    def _backlog(self):
+        """
+        Scrapes that will have to wait for a worker: queued flights beyond the idle workers about
+        to pick them up. Caller holds the lock.
+        """
+        queued = sum(f.status == QUEUED for f in self._inflight.values())
+        return queued - max(0, self.max_workers - self._busy_workers)
+
+    def _run(self, flight):
+        with self._lock:
+            if flight.cancel_event.is_set():
+                flight.finish(CANCELLED, {"error": "Scrape cancelled."})
+                return
+            flight.status = RUNNING
+            flight.started_at = time.time()
+            self._busy_workers += 1
+        try:
+            with span("scrape.job", username=flight.username, queued_seconds=flight.started_at - flight.created_at):
+                try:
+                    result = linkedin_scraper.scrape_linkedin_profile(
+                        flight.url, force_refresh=flight.force_refresh, cancel_event=flight.cancel_event
+                    )
+                except Exception as e:
+                    result = {"error": f"Failed to scrape profile: {str(e)}"}
+            with self._lock:
+                if flight.cancel_event.is_set():
+                    status = CANCELLED
+                else:
+                    status = FAILED if "error" in result else SUCCEEDED
+                flight.finish(status, result)
+                if self._inflight.get(flight.username) is flight:
+                    del self._inflight[flight.username]
+        finally:
+            with self._lock:
+                self._busy_workers -= 1
+
+    def _prune(self):
+        """Forget jobs that finished more than retention_seconds ago. Caller holds the lock."""
+        cutoff = time.time() - self.retention_seconds
+        expired = [job_id for job_id, job in self._jobs.items()
+                   if job.flight.finished_at is not None and job.flight.finished_at < cutoff]
+        for job_id in expired:
+            del self._jobs[job_id]
+
+
+_manager = None
+_manager_lock = threading.Lock()
+
+
+def get_scrape_jobs():
+    """
+    Return the process-wide job manager, shared by every Streamlit session.
+    Configured via SCRAPE_WORKERS, SCRAPE_MAX_PENDING and SCRAPE_JOB_RETENTION (seconds).
+    Returns:
+        ScrapeJobManager: Shared manager
+    """
+    global _manager
+    with _manager_lock:
+        if _manager is None:
+            _manager = ScrapeJobManager(
+                max_workers=int(os.environ.get("SCRAPE_WORKERS", 4)),
+                max_pending=int(os.environ.get("SCRAPE_MAX_PENDING", 100)),
+                retention_seconds=float(os.environ.get("SCRAPE_JOB_RETENTION", 600)),
+            )
+        return _manager
@@ -0,0 +1,216 @@
+"""
+Section-level profile analysis. Each profile section (headline, about, experience, skills,
+education, certifications) is analyzed and given improvement suggestions on its own, keyed by
+a hash of its content, so re-analyzing an edited profile only calls the model for the sections
+that changed. Changed sections are analyzed in parallel, each streamed as it is generated, and
+the report is assembled from cached and fresh parts. A compact per-section digest of the report is what the chat keeps in
+its context.
+"""
+from context_builder import PROFILE_SECTIONS, serialize_section
+from concurrent.futures import ThreadPoolExecutor
+from contextvars import copy_context
+from llm_client import DEFAULT_MODEL, DEFAULT_TEMPERATURE, stream_with_retry
+from response_cache import get_response_cache, make_key, normalize_text
+from telemetry import context_isolated, span
+import hashlib
+import os
+import queue
+import re
+import threading
+
+# Bump whenever a section prompt changes so results from the old prompts are not reused
+SECTION_PROMPT_VERSION = "v1"
+# Model calls in flight at once when (re-)analyzing changed sections
+SECTION_MAX_CONCURRENCY = int(os.environ.get("SECTION_MAX_CONCURRENCY", 12))
+# Characters of each section's analysis and suggestions kept in the chat's report digest
+SECTION_DIGEST_CHARS = int(os.environ.get("SECTION_DIGEST_CHARS", 400))
+
+ANALYSIS = "analysis"
+IMPROVEMENT = "improvement"
+
+# States yielded by iter_section_analysis
+CACHED = "cached"
+PARTIAL = "partial"
+DONE = "done"
+
+_PROMPTS = {
+    ANALYSIS: """You are a professional career coach specializing in LinkedIn profile optimization. Analyze only the {section} section of a LinkedIn profile, given below.
+- Assess the completeness and quality of the content.
+- Highlight strengths and identify weaknesses or gaps.
+- Provide specific feedback based on the actual data provided.
+Do not give generic responses. If the section is empty or lacks detail, note it and explain the impact. Start your answer with the heading "#### {title}".
+
+{text}""",
+    IMPROVEMENT: """You are a professional career coach specializing in LinkedIn profile optimization. Provide specific, actionable suggestions to improve only the {section} section of a LinkedIn profile, given below, for job opportunities and career growth:
+- Specific content to add or improve.
+- Keywords or skills to include based on the user's current data.
+- Strategies to align the section with industry standards.
+Tailor suggestions to the existing content. Start your answer with the heading "#### {title}".
+
+{text}""",
+}
+
+_FALLBACKS = {
+    ANALYSIS: "Sorry, I couldn't analyze this section.",
+    IMPROVEMENT: "Sorry, I couldn't provide suggestions for this section.",
+}
+
+
+def section_fingerprint(text):
+    """
+    Args:
+        text (str): Serialized section
+    Returns:
+        str: Content hash; formatting-only changes keep the same fingerprint
+    """
+    return hashlib.sha256(normalize_text(text).encode("utf-8")).hexdigest()
+
+
+def _unit_key(kind, section, fingerprint):
+    return make_key("section", kind, section, fingerprint, DEFAULT_MODEL, DEFAULT_TEMPERATURE, SECTION_PROMPT_VERSION)
+
+
+def _stream_unit(index, prompt, events, stop):
+    """Stream one unit's reply into the events queue as (index, chunk, error) tuples; chunk None marks the end."""
+    try:
+        for chunk in stream_with_retry(prompt, DEFAULT_MODEL, DEFAULT_TEMPERATURE):
+            if stop.is_set():
+                return
+            events.put((index, chunk, None))
+        events.put((index, None, None))
+    except Exception as e:
+        events.put((index, None, e))
+
+
+@context_isolated
+def iter_section_analysis(profile_data, max_concurrency=None):
+    """
+    Analyze a profile section by section, reusing stored results for unchanged sections.
+    Args:
+        profile_data (dict | ProfileRecord): Profile data from scrape_linkedin_profile
+        max_concurrency (int): Model calls in flight at once (defaults to SECTION_MAX_CONCURRENCY)
+    Yields:
+        tuple: (kind, section, text, state) for every section and kind ("analysis" or
+               "improvement"). Cached results come first with state CACHED; fresh ones are
+               streamed with state PARTIAL (text generated so far) and end with state DONE.
+    """
+    cache = get_response_cache()
+    pending = []
+    with span("analysis.sections", sections=len(PROFILE_SECTIONS)) as traced:
+        for section in PROFILE_SECTIONS:
+            text = serialize_section(profile_data, section)
+            fingerprint = section_fingerprint(text)
+            for kind in (ANALYSIS, IMPROVEMENT):
+                key = _unit_key(kind, section, fingerprint)
+                cached = cache.get(key)
+                if cached is not None:
+                    traced.add("cached", 1)
+                    yield kind, section, cached, CACHED
+                else:
+                    pending.append((kind, section, text, key))
+        traced.set(fresh=len(pending))
+        if not pending:
+            return
+
+        events = queue.Queue()
+        stop = threading.Event()
+        executor = ThreadPoolExecutor(max_workers=min(max_concurrency or SECTION_MAX_CONCURRENCY, len(pending)),
+                                      thread_name_prefix="section-analysis")
+        try:
+            for index, (kind, section, text, _) in enumerate(pending):
+                prompt = _PROMPTS[kind].format(section=section, title=section.title(), text=text)
+                # Each unit runs in its own copy of this context, so it keeps the span and request priority
+                executor.submit(copy_context().run, _stream_unit, index, prompt, events, stop)
+            responses = [None] * len(pending)
+            remaining = len(pending)
+            while remaining:
+                index, chunk, error = events.get()
+                kind, section, _, key = pending[index]
+                if chunk is not None:
+                    responses[index] = chunk if responses[index] is None else responses[index] + chunk
+                    if chunk.text:
+                        yield kind, section, responses[index].text, PARTIAL
+                    continue
+                remaining -= 1
+                response = responses[index]
+                if error is not None or response is None or not response.text:
+                    traced.add("errors", 1)
+                    yield kind, section, f"#### {section.title()}\n{_FALLBACKS[kind]}", DONE
+                    continue
+                usage = getattr(response, "usage_metadata", None) or {}
+                traced.add("input_tokens", usage.get("input_tokens", 0))
+                traced.add("output_tokens", usage.get("output_tokens", 0))
+                cache.set(key, response.text)
+                yield kind, section, response.text, DONE
+        finally:
+            # Closing the generator early stops the remaining units instead of finishing them unseen
+            stop.set()
+            executor.shutdown(wait=False, cancel_futures=True)
+
+
+def assemble_report(parts):
+    """
+    Join per-section results into one report in profile order.
+    Args:
+        parts (dict): Section name -> text
+    Returns:
+        str: Report text
+    """
+    return "\n\n".join(parts[section] for section in PROFILE_SECTIONS if parts.get(section))
+
+
+def _digest_text(text, max_chars):
+    body = re.sub(r"^#+ .*$", "", text, flags=re.MULTILINE)  # The section heading is repeated by the digest
+    body = normalize_text(re.sub(r"[*`#>]+", "", body))
+    if len(body) <= max_chars:
+        return body
+    return body[:max_chars].rsplit(" ", 1)[0] + "..."
+
+
+def report_digest(analysis_parts, improvement_parts, max_chars=None):
+    """
+    Condense the report into a few lines per section for the chat context, so the model keeps
+    the gist of every section within the context budget instead of the full report.
+    Args:
+        analysis_parts (dict): Section name -> analysis text
+        improvement_parts (dict): Section name -> suggestions text
+        max_chars (int): Characters kept from each part (defaults to SECTION_DIGEST_CHARS)
+    Returns:
+        str: Digest in profile order
+    """
+    max_chars = max_chars or SECTION_DIGEST_CHARS
+    lines = []
+    for section in PROFILE_SECTIONS:
+        analysis, improvement = analysis_parts.get(section), improvement_parts.get(section)
+        if not analysis and not improvement:
+            continue
+        lines.append(f"{section.title()}:")
+        if analysis:
+            lines.append(f"- Analysis: {_digest_text(analysis, max_chars)}")
+        if improvement:
+            lines.append(f"- Suggestions: {_digest_text(improvement, max_chars)}")
+    return "\n".join(lines)
+
+
+def analyze_profile_sections(profile_data, max_concurrency=None):
+    """
+    Run iter_section_analysis to completion.
+    Args:
+        profile_data (dict | ProfileRecord): Profile data from scrape_linkedin_profile
+        max_concurrency (int): Model calls in flight at once
+    Returns:
+        dict: "analysis" and "improvement" reports, their "digest", plus "cached" and "fresh" unit counts
+    """
+    parts = {ANALYSIS: {}, IMPROVEMENT: {}}
+    counts = {"cached": 0, "fresh": 0}
+    for kind, section, text, state in iter_section_analysis(profile_data, max_concurrency):
+        if state == PARTIAL:
+            continue
+        parts[kind][section] = text
+        counts["cached" if state == CACHED else "fresh"] += 1
+    return {
+        ANALYSIS: assemble_report(parts[ANALYSIS]),
+        IMPROVEMENT: assemble_report(parts[IMPROVEMENT]),
+        "digest": report_digest(parts[ANALYSIS], parts[IMPROVEMENT]),
+        **counts,
+    }
@@ -0,0 +1,264 @@
+"""
+Lightweight tracing and metrics for the scrape, agent and tool hot paths.
+
+Spans record their duration, status and attributes (e.g. token counts). Finished spans feed
+per-name Prometheus histograms and, when TELEMETRY_JSONL_PATH is set, are appended as JSON lines.
+Set METRICS_PORT to serve the Prometheus text format over HTTP, and LOG_LEVEL=DEBUG to enable
+debug logging (including the expensive profile dumps, which are skipped otherwise).
+"""
+from contextlib import contextmanager
+from contextvars import ContextVar, copy_context
+from dotenv import load_dotenv
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import functools
+import json
+import logging
+import os
+import threading
+import time
+
+# LOG_LEVEL and TELEMETRY_JSONL_PATH are read at import, which happens before app.py loads .env
+load_dotenv()
+
+logger = logging.getLogger("learntube")
+if not logger.handlers:
+    _handler = logging.StreamHandler()
+    _handler.setFormatter(logging.Formatter("%(asctime)s %(levelname)s %(name)s: %(message)s"))
+    logger.addHandler(_handler)
+logger.setLevel(os.environ.get("LOG_LEVEL", "INFO").upper())
+
+# Histogram bucket upper bounds in seconds, from a dataset poll to a multi-minute actor run
+BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300)
+
+_current_span = ContextVar("current_span", default=None)
+
+
+class Span:
+    """One timed operation. Attributes can be added while it runs, e.g. token counts."""
+
+    __slots__ = ("name", "attributes", "started_at", "duration", "status", "parent")
+
+    def __init__(self, name, attributes, parent):
+        self.name = name
+        self.attributes = attributes
+        self.parent = parent
+        self.started_at = time.time()
+        self.duration = None
+        self.status = "ok"
+
+    def set(self, **attributes):
+        self.attributes.update(attributes)
+
+    def add(self, key, amount):
+        """Accumulate a numeric attribute (e.g. prompt_tokens over several model calls)."""
+        self.attributes[key] = self.attributes.get(key, 0) + amount
+
+    def as_dict(self):
+        return {
+            "name": self.name,
+            "parent": self.parent.name if self.parent else None,
+            "start": self.started_at,
+            "duration": self.duration,
+            "status": self.status,
+            **self.attributes,
+        }
+
+
+class Telemetry:
+    """Process-wide registry of span histograms and counters."""
+
+    def __init__(self, jsonl_path=None):
+        self.jsonl_path = jsonl_path
+        self._lock = threading.Lock()
+        self._histograms = {}
+        self._counters = {}
+
+    def record(self, span):
+        with self._lock:
+            histogram = self._histograms.setdefault(span.name, {"buckets": [0] * len(BUCKETS), "count": 0, "sum": 0.0, "errors": 0})
+            histogram["count"] += 1
+            histogram["sum"] += span.duration
+            if span.status != "ok":
+                histogram["errors"] += 1
+            for index, bound in enumerate(BUCKETS):
+                if span.duration <= bound:
+                    histogram["buckets"][index] += 1
+            for key, value in span.attributes.items():
+                if key.endswith("_tokens") and isinstance(value, (int, float)):
+                    counter = f"{span.name}.{key}"
+                    self._counters[counter] = self._counters.get(counter, 0) + value
+            if self.jsonl_path:
+                with open(self.jsonl_path, "a", encoding="utf-8") as f:
+                    f.write(json.dumps(span.as_dict(), default=str) + "\n")
+
+    def increment(self, name, amount=1):
+        """Bump a free-standing counter (e.g. cache hits)."""
+        with self._lock:
+            self._counters[name] = self._counters.get(name, 0) + amount
+
+    def snapshot(self):
+        """
+        Returns:
+            dict: Copies of the span histograms and counters
+        """
+        with self._lock:
+            return {
+                "spans": {name: dict(h, buckets=list(h["buckets"])) for name, h in self._histograms.items()},
+                "counters": dict(self._counters),
+            }
+
+    def prometheus_text(self):
+        """
+        Returns:
+            str: Metrics in the Prometheus text exposition format
+        """
+        snapshot = self.snapshot()
+        lines = [
+            "# HELP learntube_span_seconds Duration of traced operations",
+            "# TYPE learntube_span_seconds histogram",
+        ]
+        for name, histogram in sorted(snapshot["spans"].items()):
+            for bound, count in zip(BUCKETS, histogram["buckets"]):
+                lines.append(f'learntube_span_seconds_bucket{{span="{name}",le="{bound}"}} {count}')
+            lines.append(f'learntube_span_seconds_bucket{{span="{name}",le="+Inf"}} {histogram["count"]}')
+            lines.append(f'learntube_span_seconds_sum{{span="{name}"}} {histogram["sum"]:.6f}')
+            lines.append(f'learntube_span_seconds_count{{span="{name}"}} {histogram["count"]}')
+        lines.append("# TYPE learntube_span_errors_total counter")
+        for name, histogram in sorted(snapshot["spans"].items()):
+            lines.append(f'learntube_span_errors_total{{span="{name}"}} {histogram["errors"]}')
+        lines.append("# TYPE learntube_events_total counter")
+        for name, value in sorted(snapshot["counters"].items()):
+            lines.append(f'learntube_events_total{{name="{name}"}} {value}')
+        return "\n".join(lines) + "\n"
+
+
+telemetry = Telemetry(os.environ.get("TELEMETRY_JSONL_PATH") or None)
+
+
+@contextmanager
+def span(name, **attributes):
+    """
+    Time a block of work as a named span.
+    Args:
+        name (str): Span name, e.g. "apify.dataset_poll"
+        **attributes: Initial attributes (run ids, token counts, ...)
+    Yields:
+        Span: The running span, for adding attributes
+    """
+    current = Span(name, attributes, _current_span.get())
+    token = _current_span.set(current)
+    start = time.perf_counter()
+    try:
+        yield current
+    except BaseException as e:
+        current.status = "error"
+        current.attributes["error"] = type(e).__name__
+        raise
+    finally:
+        current.duration = time.perf_counter() - start
+        _current_span.reset(token)
+        telemetry.record(current)
+        logger.debug("span %s %.3fs %s", name, current.duration, current.attributes)
+
+
+def context_isolated(function):
+    """
+    Decorate a generator function so every step of the generator runs in its own copy of the
+    caller's context. Spans (and other context variables, e.g. request priority) it opens
+    around its yields then stay with the generator instead of leaking into the caller between
+    yields, and are closed in the context that opened them even if the caller stops early.
+    Args:
+        function (callable): Generator function
+    Returns:
+        callable: Generator function with the same signature
+    """
+    @functools.wraps(function)
+    def wrapper(*args, **kwargs):
+        generator = function(*args, **kwargs)
+        context = None
+        try:
+            while True:
+                # Copied on the first step, when the generator body would start running
+                context = context or copy_context()
+                try:
+                    item = context.run(next, generator)
+                except StopIteration:
+                    return
+                yield item
+        finally:
+            if context is not None:
+                context.run(generator.close)
+    return wrapper
+
+
+def record_span(name, duration, status="ok", **attributes):
+    """
+    Record a span that was timed elsewhere (e.g. an actor run measured by run_waiter.RunTimer).
+    Args:
+        name (str): Span name
+        duration (float): Seconds
+        status (str): "ok" or an error status
+        **attributes: Span attributes
+    """
+    finished = Span(name, attributes, None)
+    finished.duration = duration
+    finished.status = status
+    telemetry.record(finished)
+
+
+def current_span():
+    """
+    Returns:
+        Span: The innermost running span in this context, or None
+    """
+    return _current_span.get()
+
+
+def debug_json(label, value):
+    """Log a value as indented JSON, serializing it only when debug logging is enabled."""
+    if logger.isEnabledFor(logging.DEBUG):
+        logger.debug("%s %s", label, json.dumps(value.to_dict() if hasattr(value, "to_dict") else value, indent=2, default=str))
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.rstrip("/") in ("", "/metrics"):
+            body = telemetry.prometheus_text().encode("utf-8")
+            content_type = "text/plain; version=0.0.4"
+        elif self.path.rstrip("/") == "/metrics.json":
+            body = json.dumps(telemetry.snapshot()).encode("utf-8")
+            content_type = "application/json"
+        else:
+            self.send_error(404)
+            return
+        self.send_response(200)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass  # Keep scrapes out of the app log
+
+
+_server = None
+_server_lock = threading.Lock()
+
+
+def start_metrics_server(port=None):
+    """
+    Serve /metrics (Prometheus text) and /metrics.json from a daemon thread. Safe to call on every
+    Streamlit rerun: only the first call starts the server, and nothing starts without a port.
+    Args:
+        port (int): Port to listen on (defaults to METRICS_PORT)
+    Returns:
+        ThreadingHTTPServer: The running server, or None if no port is configured
+    """
+    global _server
+    port = port or int(os.environ.get("METRICS_PORT", 0) or 0)
+    with _server_lock:
+        if _server is None and port:
+            _server = ThreadingHTTPServer(("0.0.0.0", port), _MetricsHandler)
+            threading.Thread(target=_server.serve_forever, name="metrics-server", daemon=True).start()
+            logger.info("Serving metrics on port %d", port)
+        return _server